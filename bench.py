@@ -0,0 +1,362 @@
+"""
+Headless benchmarks for the ticker, the proxy transforms and the widget
+paint path.
+
+Runs under the offscreen Qt platform unless QT_QPA_PLATFORM is set.
+Results are written as JSON; pass an earlier result file with
+`--compare` to print the relative change of every workload.
+
+    python bench.py -o bench.json
+    python bench.py --compare bench.json ticker paint
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np  # noqa: E402
+from PyQt5 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+import scanwidget  # noqa: E402
+from test_ticker import TickTest  # noqa: E402
+from ticker import Ticker, ScalarTicker  # noqa: E402
+
+
+def intervals():
+    """
+    The interval grid of `test_ticker.TickTest.test_many`.
+    """
+    t = TickTest()
+    return [(a, b) for a in t._a() for b in t._b(a)
+            if a < b and np.all(np.isfinite((a, b)))]
+
+
+def widget(width=600):
+    w = scanwidget.ScanWidget()
+    w.resize(width, 120)
+    w.show()
+    QtWidgets.QApplication.processEvents()
+    w.fitToView()
+    QtWidgets.QApplication.processEvents()
+    return w
+
+
+def mouse(widget, kind, x, y, buttons=QtCore.Qt.LeftButton):
+    button = QtCore.Qt.NoButton if kind == QtCore.QEvent.MouseMove \
+        else QtCore.Qt.LeftButton
+    ev = QtGui.QMouseEvent(kind, QtCore.QPointF(x, y), button, buttons,
+                           QtCore.Qt.NoModifier)
+    QtWidgets.QApplication.sendEvent(widget, ev)
+
+
+def wheel(widget, x, dy):
+    ev = QtGui.QWheelEvent(QtCore.QPointF(x, 10), QtCore.QPointF(x, 10),
+                           QtCore.QPoint(0, 0), QtCore.QPoint(0, dy),
+                           QtCore.Qt.NoButton, QtCore.Qt.NoModifier,
+                           QtCore.Qt.ScrollUpdate, False)
+    QtWidgets.QApplication.sendEvent(widget, ev)
+
+
+# Every workload returns a function that runs it once and returns the number
+# of operations it did, or that number and the time they took.
+
+def bench_ticker():
+    grid = intervals()
+    tickers = [Ticker(n) for n in (2, 3, 4, 10)]
+
+    def run():
+        for t in tickers:
+            for a, b in grid:
+                t(a, b)
+        return len(tickers)*len(grid)
+    return run
+
+
+def bench_ticker_scalar():
+    grid = intervals()
+    tickers = [ScalarTicker(n) for n in (2, 3, 4, 10)]
+
+    def run():
+        for t in tickers:
+            for a, b in grid:
+                t(a, b)
+        return len(tickers)*len(grid)
+    return run
+
+
+def bench_ticker_batch():
+    a, b = np.array(intervals()).T
+    tickers = [Ticker(n) for n in (2, 3, 4, 10)]
+
+    def run():
+        for t in tickers:
+            t.batch(a, b)
+        return len(tickers)*len(a)
+    return run
+
+
+def bench_zoom_storm():
+    w = widget()
+    r = random.Random(0)
+    steps = [(1.05**r.choice((-3, -1, 1, 3)), r.uniform(0, 580))
+             for i in range(1000)]
+
+    def run():
+        for z, x in steps:
+            w.proxy.handleZoom(z, x)
+        return len(steps)
+    return run
+
+
+def bench_wheel_storm():
+    w = widget()
+    r = random.Random(0)
+    # bursts of touchpad events at a resting mouse, one flush per frame,
+    # alternately zooming in and out
+    bursts = [(r.uniform(0, 580), [(-1)**j*r.choice((15, 40, 120))
+                                   for i in range(20)])
+              for j in range(50)]
+
+    def run():
+        axis = w.proxy.axis
+        for x, deltas in bursts:
+            for dy in deltas:
+                wheel(axis, x, dy)
+            axis.flushZoom()
+            axis.repaint()
+        return sum(len(deltas) for x, deltas in bursts)
+    return run
+
+
+def bench_wheel_predict():
+    w = widget()
+    # notch by notch zoom at a resting mouse, with the worker idle between
+    # frames; only the frames are timed
+    steps = [(-1)**(i//10)*120 for i in range(100)]
+
+    def run():
+        axis = w.proxy.axis
+        t = 0
+        for dy in steps:
+            wheel(axis, 200, dy)
+            axis.flushZoom()
+            t0 = time.perf_counter()
+            axis.repaint()
+            t += time.perf_counter() - t0
+            if scanwidget.Prefetcher.executor is not None:
+                scanwidget.Prefetcher.executor.submit(int).result()
+        return len(steps), t
+    return run
+
+
+def bench_drag():
+    w = widget()
+    slider = w.proxy.slider
+    y = slider.height()//2
+    x0 = round(slider.maxPos + slider.handleWidth()/2)
+    path = [x0 + round(100*np.sin(i/20)) for i in range(500)]
+
+    def run():
+        slider = w.proxy.slider
+        mouse(slider, QtCore.QEvent.MouseButtonPress, x0, y)
+        for x in path:
+            mouse(slider, QtCore.QEvent.MouseMove, x, y)
+            slider.repaint()
+        mouse(slider, QtCore.QEvent.MouseButtonRelease, path[-1], y,
+              QtCore.Qt.NoButton)
+        return len(path)
+    return run
+
+
+def bench_handle_move():
+    w = widget(1600)
+    path = [800 + 300*np.sin(i/20) for i in range(500)]
+
+    def run():
+        slider = w.proxy.slider
+        for x in path:
+            slider.setUpperPosition(x)
+            # paint only what was invalidated, like the event loop does
+            QtWidgets.QApplication.processEvents()
+        return len(path)
+    return run
+
+
+def bench_pan():
+    w = widget()
+    steps = [(-1)**(i//50)*3 for i in range(200)]
+    image = QtGui.QImage(w.proxy.axis.size(),
+                         QtGui.QImage.Format_ARGB32_Premultiplied)
+
+    def run():
+        axis = w.proxy.axis
+        for dx in steps:
+            w.proxy.handlePan(dx)
+            axis.render(image)
+        return len(steps)
+    return run
+
+
+def bench_paint():
+    w = widget()
+    image = QtGui.QImage(w.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+
+    def run():
+        for i in range(100):
+            w.render(image)
+        return 100
+    return run
+
+
+def bench_paint_zoom():
+    w = widget()
+    image = QtGui.QImage(w.proxy.axis.size(),
+                         QtGui.QImage.Format_ARGB32_Premultiplied)
+
+    def run():
+        axis = w.proxy.axis
+        for i in range(100):
+            w.proxy.handleZoom(1.05**(-1)**(i//10), 200)
+            axis.render(image)
+        return 100
+    return run
+
+
+def in_subprocess(code):
+    """
+    Run `code` in a fresh interpreter that prints the time it measured.
+    """
+    def run():
+        out = subprocess.check_output(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL)
+        return 1, float(out)
+    return run
+
+
+def bench_import():
+    return in_subprocess(
+        "import time\n"
+        "from PyQt5 import QtWidgets\n"
+        "t0 = time.perf_counter()\n"
+        "import scanwidget\n"
+        "print(time.perf_counter() - t0)\n")
+
+
+def bench_startup():
+    # time to first paint of a ScanWidget, excluding Qt itself
+    return in_subprocess(
+        "import time\n"
+        "from PyQt5 import QtGui, QtWidgets\n"
+        "app = QtWidgets.QApplication([])\n"
+        "t0 = time.perf_counter()\n"
+        "import scanwidget\n"
+        "w = scanwidget.ScanWidget()\n"
+        "w.resize(600, 120)\n"
+        "w.render(QtGui.QImage(w.size(), QtGui.QImage.Format_ARGB32))\n"
+        "print(time.perf_counter() - t0)\n")
+
+
+def bench_construct():
+    def run():
+        widgets = [scanwidget.ScanWidget() for i in range(50)]
+        return len(widgets)
+    return run
+
+
+workloads = {
+    "import": bench_import,
+    "startup": bench_startup,
+    "construct": bench_construct,
+    "ticker": bench_ticker,
+    "ticker_scalar": bench_ticker_scalar,
+    "ticker_batch": bench_ticker_batch,
+    "zoom_storm": bench_zoom_storm,
+    "wheel_storm": bench_wheel_storm,
+    "wheel_predict": bench_wheel_predict,
+    "drag": bench_drag,
+    "handle_move": bench_handle_move,
+    "pan": bench_pan,
+    "paint": bench_paint,
+    "paint_zoom": bench_paint_zoom,
+}
+
+
+def measure(run, repeat):
+    times = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        n = run()
+        t = time.perf_counter() - t0
+        if isinstance(n, tuple):
+            n, t = n
+        times.append(t)
+    return {
+        "ops": n,
+        "best": min(times),
+        "median": statistics.median(times),
+        "per_op": min(times)/n,
+    }
+
+
+def meta():
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "qt": QtCore.QT_VERSION_STR,
+        "pyqt": QtCore.PYQT_VERSION_STR,
+        "platform": platform.platform(),
+        "qpa": os.environ["QT_QPA_PLATFORM"],
+    }
+
+
+def compare(results, baseline):
+    for name, r in results.items():
+        if name not in baseline:
+            continue
+        ratio = r["per_op"]/baseline[name]["per_op"]
+        print("{:16s} {:10.3g} s/op  {:+7.1%}".format(
+            name, r["per_op"], ratio - 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("workload", nargs="*",
+                        help="workloads to run (default: all of {})".format(
+                            ", ".join(workloads)))
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write JSON results here")
+    parser.add_argument("--compare", metavar="JSON",
+                        help="earlier results to compare against")
+    args = parser.parse_args()
+    for name in args.workload:
+        if name not in workloads:
+            parser.error("unknown workload {!r}".format(name))
+
+    app = QtWidgets.QApplication([])  # noqa: F841
+    results = {}
+    for name in args.workload or workloads:
+        results[name] = r = measure(workloads[name](), args.repeat)
+        print("{:16s} {:10.3g} s/op  ({} ops, best {:.3g} s)".format(
+            name, r["per_op"], r["ops"], r["best"]), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
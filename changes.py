@@ -0,0 +1,78 @@
+"""
+Asynchronous change notification for asyncio consumers of a ScanWidget.
+
+`ScanChanges` turns a change signal into an asynchronous iterator of
+snapshots. All changes up to the next turn of the event loop are
+coalesced into one snapshot, and unconsumed snapshots are kept in a
+bounded queue that drops the oldest one when full. A slow consumer thus
+never backs up the GUI thread or builds up an unbounded backlog; it only
+misses intermediate states. The latest state is always delivered.
+"""
+
+import asyncio
+from collections import deque
+
+
+class ScanChanges:
+    def __init__(self, signal, snapshot, maxsize=16):
+        """
+        signal: signal (anything with `connect()` and `disconnect()`)
+            emitted on every change
+        snapshot: callable returning the current state
+        maxsize: maximum number of queued snapshots
+        """
+        self.signal = signal
+        self.snapshot = snapshot
+        self.queue = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.loop = None
+        self.scheduled = False
+        self.waiter = None
+        self.closed = False
+        signal.connect(self.changed)
+
+    def changed(self):
+        if self.loop is None:
+            # Nobody is iterating yet, there is no loop to defer to.
+            self.push()
+        elif not self.scheduled:
+            self.scheduled = True
+            self.loop.call_soon(self.push)
+
+    def push(self):
+        self.scheduled = False
+        if self.closed:
+            return
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(self.snapshot())
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    def close(self):
+        """
+        Stop following the signal and end the iteration once the queued
+        snapshots are consumed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.signal.disconnect(self.changed)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        while not self.queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self.waiter = self.loop.create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return self.queue.popleft()
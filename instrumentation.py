@@ -0,0 +1,118 @@
+"""
+Opt-in timing of the ScanWidget hot paths.
+
+An `Instrument` times named spans of code and hands a record
+`{"name": ..., "start": ..., "duration": ...}` (seconds, from
+`time.perf_counter()`) to each of its sinks. A sink is any callable taking
+a record; `RingBufferSink` and `JsonlSink` are provided. The instrument
+also keeps a per-name count and total duration.
+
+Uninstrumented code uses `null`, whose spans do nothing.
+"""
+
+import json
+from collections import Counter, defaultdict, deque
+from time import perf_counter
+
+
+class Span:
+    __slots__ = ("instrument", "name", "start")
+
+    def __init__(self, instrument, name):
+        self.instrument = instrument
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instrument.record(self.name, self.start,
+                               perf_counter() - self.start)
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class NullInstrument:
+    """
+    Instrument that records nothing. Entering one of its spans costs little
+    more than the method call.
+    """
+    enabled = False
+    span = NullSpan()
+
+    def time(self, name):
+        return self.span
+
+
+null = NullInstrument()
+
+
+class Instrument:
+    """
+    Time named spans and pass the records on to the sinks.
+
+        with instrument.time("axis.paint"):
+            ...
+    """
+    enabled = True
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+        self.counts = Counter()
+        self.totals = defaultdict(float)
+
+    def time(self, name):
+        return Span(self, name)
+
+    def record(self, name, start, duration):
+        self.counts[name] += 1
+        self.totals[name] += duration
+        if self.sinks:
+            record = {"name": name, "start": start, "duration": duration}
+            for sink in self.sinks:
+                sink(record)
+
+    def summary(self):
+        """
+        Return `{name: (count, total duration)}` of all spans so far.
+        """
+        return {name: (n, self.totals[name])
+                for name, n in self.counts.items()}
+
+    def reset(self):
+        self.counts.clear()
+        self.totals.clear()
+
+
+class RingBufferSink:
+    """
+    Keep the last `maxlen` records in memory.
+    """
+    def __init__(self, maxlen=4096):
+        self.records = deque(maxlen=maxlen)
+
+    def __call__(self, record):
+        self.records.append(record)
+
+
+class JsonlSink:
+    """
+    Append records to a file, one JSON object per line.
+    """
+    def __init__(self, path):
+        self.file = open(path, "a")
+
+    def __call__(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
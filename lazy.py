@@ -0,0 +1,50 @@
+import importlib
+import importlib.util
+import sys
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for module `name` that imports it on first attribute access.
+
+    Importing NumPy takes longer than importing the whole widget. Modules
+    that only need it once they do actual work refer to it through this,
+    which moves the cost from import time to the first use, and avoids it
+    where it is never used.
+
+    Unlike `importlib.util.LazyLoader`, this leaves `sys.modules` alone:
+    the host application's own `import numpy` is an ordinary import, and
+    the module is imported under the regular import lock.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return "<lazy module {!r}>".format(self._name)
+
+
+def lazy_import(name):
+    """
+    Return a `LazyModule` for module `name`, or the module itself if it is
+    already imported.
+    """
+    try:
+        return sys.modules[name]
+    except KeyError:
+        pass
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError("No module named {!r}".format(name),
+                                  name=name)
+    return LazyModule(name)
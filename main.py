@@ -56,7 +56,7 @@ def main():
     # scanner.sigNumChanged.connect(spinboxes[2].setValue)
     spinboxes[0].valueChanged.connect(scanner.setMin)
     spinboxes[1].valueChanged.connect(scanner.setMax)
-    # spinboxes[2].valueChanged.connect(scanner.setNumPoints)
+    spinboxes[2].valueChanged.connect(scanner.setNumPoints)
 
     win.setCentralWidget(container)
     win.show()
@@ -0,0 +1,23 @@
+class ScanModel:
+    """
+    The state of one scan: first point `start`, last point `stop`, number
+    of points `npoints` and the `transform.AffineMap` `view` of the axis,
+    or `None` if it was never shown.
+
+    A `ScanWidget` edits the model it is given with
+    `ScanWidget.setModel()`, so many models, e.g. one per scannable
+    parameter, can share a few widgets (see `ScanDelegate`). Models do
+    not depend on Qt.
+    """
+    __slots__ = ("start", "stop", "npoints", "view")
+
+    def __init__(self, start=0., stop=0., npoints=10, view=None):
+        self.start = start
+        self.stop = stop
+        self.npoints = npoints
+        self.view = view
+
+    def __repr__(self):
+        return "ScanModel(start={!r}, stop={!r}, npoints={!r}, " \
+            "view={!r})".format(self.start, self.stop, self.npoints,
+                                self.view)
@@ -0,0 +1,124 @@
+import random
+
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+class LinearScan:
+    """
+    The evenly spaced points of a scan from `start` to `stop`, both
+    included, as configured on a `ScanWidget`.
+
+    The points are exactly those of `np.linspace(start, stop, num)`, but
+    they are computed from their indices on demand. `chunks()` and
+    `shuffled()` stream them in arrays of a fixed size, so the memory used
+    does not grow with the number of points.
+    """
+    def __init__(self, start, stop, num):
+        if num < 0:
+            raise ValueError("Need a non-negative number of points")
+        self.start = float(start)
+        self.stop = float(stop)
+        self.num = int(num)
+
+    def __repr__(self):
+        return "LinearScan(start={!r}, stop={!r}, num={!r})".format(
+            self.start, self.stop, self.num)
+
+    def __len__(self):
+        return self.num
+
+    def at(self, index):
+        """
+        Return the points with the integer indices in the array `index`.
+        """
+        index = np.asarray(index)
+        i = index.astype(np.float64)
+        delta = self.stop - self.start
+        div = self.num - 1
+        # Same operations as np.linspace(), including its handling of
+        # steps that underflow to zero.
+        if div > 0:
+            step = delta/div
+            if step == 0:
+                y = i/div*delta
+            else:
+                y = i*step
+        else:
+            y = i*delta
+        y += self.start
+        if div > 0:
+            y[index == div] = self.stop
+        return y
+
+    def array(self):
+        """
+        Return all points as one array.
+        """
+        return self.at(np.arange(self.num))
+
+    def chunks(self, size=1 << 16):
+        """
+        Generate the points in order, as arrays of at most `size` points.
+        """
+        for i in range(0, self.num, size):
+            yield self.at(np.arange(i, min(i + size, self.num)))
+
+    def shuffled(self, size=1 << 16, seed=None):
+        """
+        Generate all points in a random order, as arrays of at most `size`
+        points.
+
+        The order is given by a `Permutation` of the indices, so it is
+        reproducible for a given `seed` and nothing but the current chunk
+        is held in memory.
+        """
+        permutation = Permutation(self.num, seed)
+        for i in range(0, self.num, size):
+            index = np.arange(i, min(i + size, self.num), dtype=np.uint64)
+            yield self.at(permutation(index).astype(np.int64))
+
+
+class Permutation:
+    """
+    Pseudo-random permutation of the integers `0` to `n - 1`.
+
+    A balanced Feistel network permutes the smallest domain of an even
+    number of bits that contains `n`. Values that land outside `[0, n)`
+    are mapped again until they fall inside ("cycle walking"). This keeps
+    the map a bijection on `[0, n)`, and as the domain is less than four
+    times larger than `n`, only a few passes are needed. No table is
+    stored, so any index can be mapped on its own in constant memory.
+    """
+    def __init__(self, n, seed=None, rounds=4):
+        self.n = n
+        self.half = max(1, (n - 1).bit_length() + 1 >> 1)
+        self.mask = np.uint64((1 << self.half) - 1)
+        r = random.Random(seed)
+        self.keys = [np.uint64(r.getrandbits(64)) for i in range(rounds)]
+
+    def _round(self, x, key):
+        # A multiply-xorshift hash of the right half and the round key.
+        # uint64 arithmetic on arrays wraps around silently.
+        x = (x ^ key)*np.uint64(0x9e3779b97f4a7c15)
+        return x ^ (x >> np.uint64(29))
+
+    def _feistel(self, x):
+        half = np.uint64(self.half)
+        left, right = x >> half, x & self.mask
+        for key in self.keys:
+            left, right = right, left ^ (self._round(right, key) & self.mask)
+        return (left << half) | right
+
+    def __call__(self, index):
+        """
+        Return the images of the indices in the uint64 array `index`.
+        """
+        x = self._feistel(np.asarray(index, np.uint64))
+        n = np.uint64(self.n)
+        outside = x >= n
+        while outside.any():
+            x[outside] = self._feistel(x[outside])
+            outside = x >= n
+        return x
@@ -1,61 +1,420 @@
+import math
+import time
+from collections import deque
+
 from PyQt5 import QtGui, QtCore, QtWidgets
-from ticker import Ticker
+import instrumentation
+from lazy import lazy_import
+from model import ScanModel
+from points import LinearScan
+from ticker import ScalarTicker, CachedTicker, Prefetcher
+from transform import AffineMap
+
+np = lazy_import("numpy")
 
 
 class ScanAxis(QtWidgets.QWidget):
-    sigZoom = QtCore.pyqtSignal(float, int)
+    sigZoom = QtCore.pyqtSignal(float, float)
+    sigPan = QtCore.pyqtSignal(int)
+    pointColor = QtGui.QColor(0x00, 0x80, 0x00)
+    zoomInterval = 16  # ms, wheel events within a frame are merged
+    zoomPrefetch = 3  # zoom levels in each direction to prefetch ticks for
+    panInterval = 16  # ms between kinetic scrolling steps
+    panFriction = .95  # velocity kept per kinetic scrolling step
+    labelSpacing = 6  # px, minimum gap between two labels
+    instrument = instrumentation.null
 
     def __init__(self):
         QtWidgets.QWidget.__init__(self)
         self.proxy = None
         self.sizePolicy().setControlType(QtWidgets.QSizePolicy.ButtonBox)
-        self.ticker = Ticker()
+        self.ticker = CachedTicker(ScalarTicker())
+        self.prefetcher = Prefetcher(self.ticker)
+        self.zoomPrediction = None
+        self.layer = None
+        self.layerKey = None
+        self.layerView = None
+        self.layerLayout = None
+        self.layerLabels = None
+        self.zoomDelta = 0
+        self.zoomAnchor = None
+        self.mergedZoomEvents = 0
+        self.zoomTimer = QtCore.QTimer(self)
+        self.zoomTimer.setSingleShot(True)
+        self.zoomTimer.setInterval(self.zoomInterval)
+        self.zoomTimer.timeout.connect(self.flushZoom)
+        self.dragX = None
+        self.dragSamples = deque(maxlen=8)
+        self.panVelocity = 0.
+        self.panRemainder = 0.
+        self.panTimer = QtCore.QTimer(self)
+        self.panTimer.setInterval(self.panInterval)
+        self.panTimer.timeout.connect(self.kineticPan)
 
     def paintEvent(self, ev):
+        with self.instrument.time("axis.paint"):
+            self.drawWidget()
+        # Only start prefetching once the current view is drawn, so the
+        # worker does not compete with it.
+        if self.zoomPrediction is not None:
+            self.prefetchZoom(*self.zoomPrediction)
+            self.zoomPrediction = None
+        # TODO:
+        # QtWidgets.QWidget.paintEvent(self, ev)?
+        # ev.accept() ?
+
+    def drawWidget(self):
         painter = QtGui.QPainter(self)
-        font = painter.font()
-        avgCharWidth = QtGui.QFontMetrics(font).averageCharWidth()
+        painter.drawPixmap(0, 0, self.axisLayer())
+        # The prefix and the baseline stay put while the layer pans
+        # underneath.
+        painter.drawText(0, 10, self.layerLayout.prefix)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        handleWidth = self.proxy.slider.handleWidth()
+        painter.translate(handleWidth/2, self.height() - 5)
+        painter.drawLine(0, 0, self.width(), 0)
+        self.drawPoints(painter, -handleWidth/2, self.width() - handleWidth/2)
+
+    # Ticks and labels only depend on the view, so they are rendered into a
+    # pixmap once and blitted on repaints that only move the handles or the
+    # scan points. When the view was only translated by whole pixels and
+    # the tick step, offset and format stay the same, the pixmap is scrolled
+    # and only the exposed strip is drawn.
+    def axisLayer(self):
+        transform = self.proxy.realToPixelTransform
+        dpr = self.devicePixelRatioF()
+        key = (transform.scale, self.width(), self.height(),
+               self.font().key(), self.palette().cacheKey(), dpr,
+               self.proxy.slider.handleWidth())
+        if key == self.layerKey and transform.origin(self.layerView) == 0:
+            return self.layer
+        with self.instrument.time("ticker"):
+            layout = self.ticker.layout(self.proxy.pixelToReal(0),
+                                        self.proxy.pixelToReal(self.width()))
+        widths = labelWidths(self.font(), layout.labels)
+        labelWidth = max(widths, default=0)
+        stride = self.labelStride(layout, labelWidth)
+        strips = None
+        old = self.layerLayout
+        if key == self.layerKey and (
+                layout.step, layout.offset, layout.magnitude,
+                layout.decimals, stride) == (old.step, old.offset,
+                                             old.magnitude, old.decimals,
+                                             self.layerLabels[1]) and \
+                self.keepsTicks(old, layout):
+            # where the old pixel 0 is now
+            dx = transform.origin(self.layerView)
+            shift = round(dx)
+            # Labels reach into the view from ticks just outside of it.
+            # Those change at both edges, so bands of a label width there
+            # are redrawn along with the exposed strip.
+            margin = math.ceil(max(labelWidth, self.layerLabels[0])) + 2
+            width = self.width()
+            if abs(shift) + 2*margin < width and \
+                    abs(dx - shift) < 1e-6 and (shift*dpr).is_integer():
+                if shift > 0:
+                    strips = [(0, shift + margin), (width - margin, width)]
+                else:
+                    strips = [(0, margin), (width + shift - margin, width)]
+
+        if strips is None:
+            self.layer = QtGui.QPixmap(self.size()*dpr)
+            self.layer.setDevicePixelRatio(dpr)
+            self.layer.fill(QtCore.Qt.transparent)
+            strips = [(0, self.width())]
+        else:
+            self.layer.scroll(round(shift*dpr), 0, self.layer.rect())
+        painter = QtGui.QPainter(self.layer)
+        painter.setFont(self.font())
+        painter.setPen(self.palette().color(QtGui.QPalette.WindowText))
+        for left, right in strips:
+            rect = QtCore.QRect(left, 0, right - left, self.height())
+            painter.save()
+            painter.setClipRect(rect)
+            painter.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+            painter.fillRect(rect, QtCore.Qt.transparent)
+            painter.setCompositionMode(
+                QtGui.QPainter.CompositionMode_SourceOver)
+            self.drawAxis(painter, layout, left, right, widths, stride)
+            painter.restore()
+        painter.end()
+        self.layerKey = key
+        self.layerView = transform
+        self.layerLayout = layout
+        self.layerLabels = labelWidth, stride
+        return self.layer
+
+    # Only every stride-th tick is labeled, so that the widest label plus
+    # labelSpacing fits between labels. Strides are 1, 2, 5, 10, ... ticks,
+    # which keeps the labeled values round.
+    def labelStride(self, layout, labelWidth):
+        spacing = layout.step*self.proxy.realToPixelTransform.scale
+        stride = 1
+        for m in (2, 2.5, 2)*8:
+            if stride*spacing >= labelWidth + self.labelSpacing:
+                break
+            stride = round(stride*m)
+        return stride
+
+    # Whether the ticks that two layouts with the same step have in common
+    # are at the same values and labeled the same. They are not always:
+    # ticks are multiples of the step added to the first tick and round
+    # differently far from zero, and a first tick of zero inherits the
+    # sign of the interval start and is labeled "−0".
+    def keepsTicks(self, old, new):
+        k = round((new.ticks[0] - old.ticks[0])/new.step)
+        i, j = max(k, 0), max(-k, 0)
+        return all(a == b for a, b in zip(
+            zip(old.ticks[i:], old.labels[i:]),
+            zip(new.ticks[j:], new.labels[j:])))
+
+    # Draw the ticks and labels of the TickLayout that touch the widget
+    # columns from left to right. Labels have the given widths. All ticks
+    # are drawn but only those at a multiple of stride steps from the
+    # offset are labeled, so that the labeled ticks stay put when the view
+    # pans.
+    def drawAxis(self, painter, layout, left, right, widths, stride):
         painter.setRenderHint(QtGui.QPainter.Antialiasing)
         # The center of the slider handles should reflect what's displayed
         # on the spinboxes.
-        painter.translate(self.proxy.slider.handleWidth()/2, self.height() - 5)
-        painter.drawLine(0, 0, self.width(), 0)
-        realMin = self.proxy.pixelToReal(0)
-        realMax = self.proxy.pixelToReal(self.width())
-
-        ticks, prefix, labels = self.ticker(realMin, realMax)
-        for t, l in zip(ticks, labels):
-            t = self.proxy.realToPixel(t)
-            textCenter = (len(l)/2.0)*avgCharWidth
-            painter.drawLine(t, 5, t, -5)
-            painter.drawText(t - textCenter, -10, l)
-        painter.resetTransform()
-        painter.drawText(0, 10, prefix)
-        # TODO:
-        # QtWidgets.QWidget.paintEvent(self, ev)?
-        # ev.accept() ?
+        handleWidth = self.proxy.slider.handleWidth()
+        painter.translate(handleWidth/2, self.height() - 5)
+
+        # Ticks and labels are snapped to the device pixel grid, and tick
+        # lines cover whole device pixels. What is scrolled with the layer
+        # is then drawn exactly like what is drawn afresh, even if the
+        # positions differ by a rounding error. Rounding is done with
+        # floor(x + .5), which commutes with scrolling by whole pixels.
+        dpr = painter.device().devicePixelRatioF()
+        weight = max(round(dpr), 1)
+        pen = painter.pen()
+        pen.setWidthF(weight/dpr)
+        painter.setPen(pen)
+        origin = handleWidth*dpr/2
+        base = math.floor(origin) + weight % 2/2
+        columns = [math.floor(self.proxy.realToPixel(t)*dpr + .5)
+                   for t in layout.ticks]
+        pixels = [(c + base - origin)/dpr for c in columns]
+        lines = pixels
+        labeled = range(len(pixels))
+        if stride > 1:
+            labeled = [i for i, t in enumerate(layout.ticks)
+                       if round((t - layout.offset)/layout.step) %
+                       stride == 0]
+        if right - left < self.width():
+            # labels reach half their width beyond the tick
+            margin = max(widths)/2 + 1
+            lo = left - handleWidth/2 - margin
+            hi = right - handleWidth/2 + margin
+            lines = [t for t in pixels if lo <= t <= hi]
+            labeled = [i for i in labeled if lo <= pixels[i] <= hi]
+        painter.drawLines([QtCore.QLineF(t, 5, t, -5) for t in lines])
+        for i in labeled:
+            x = math.floor(columns[i] + base - widths[i]*dpr/2 + .5)
+            painter.drawText(QtCore.QPointF((x - origin)/dpr, -10),
+                             layout.labels[i])
+
+    # Scan points are short marks above the axis. Dense scans become a solid
+    # bar, one mark per pixel column.
+    def drawPoints(self, painter, left, right):
+        pixels = self.proxy.pointPixels(left, right)
+        if not pixels:
+            return
+        painter.save()
+        painter.setPen(self.pointColor)
+        painter.drawLines([QtCore.QLineF(p, 0, p, -3) for p in pixels])
+        painter.restore()
+
+    # Dragging the axis pans the view by whole pixels, so that the axis
+    # layer can be scrolled. Released with some speed, the view keeps
+    # gliding and slows down by panFriction each panInterval.
+    def mousePressEvent(self, ev):
+        if ev.button() != QtCore.Qt.LeftButton:
+            ev.ignore()
+            return
+        self.panTimer.stop()
+        self.dragX = ev.x()
+        self.dragSamples.clear()
+        self.dragSamples.append((time.perf_counter(), ev.x()))
+        ev.accept()
+
+    def mouseMoveEvent(self, ev):
+        if self.dragX is None:
+            ev.ignore()
+            return
+        dx = ev.x() - self.dragX
+        if dx:
+            self.dragX = ev.x()
+            self.pan(dx)
+        self.dragSamples.append((time.perf_counter(), ev.x()))
+        ev.accept()
 
+    def mouseReleaseEvent(self, ev):
+        if self.dragX is None or ev.button() != QtCore.Qt.LeftButton:
+            ev.ignore()
+            return
+        self.dragX = None
+        now = time.perf_counter()
+        # velocity over the last 100 ms of the drag, in pixels per step
+        samples = [(t, x) for t, x in self.dragSamples if now - t < .1]
+        if len(samples) > 1 and samples[-1][0] > samples[0][0]:
+            (t0, x0), (t1, x1) = samples[0], samples[-1]
+            self.panVelocity = (x1 - x0)/(t1 - t0)*self.panInterval/1000
+            self.panRemainder = 0.
+            if abs(self.panVelocity) >= 1:
+                self.panTimer.start()
+        ev.accept()
+
+    def kineticPan(self):
+        self.panRemainder += self.panVelocity
+        dx = int(self.panRemainder)
+        self.panRemainder -= dx
+        if dx:
+            self.pan(dx)
+        self.panVelocity *= self.panFriction
+        if abs(self.panVelocity) < .5:
+            self.panTimer.stop()
+
+    def pan(self, dx):
+        self.sigPan.emit(dx)
+        self.update()
+
+    # Wheel events are not applied right away. Their angles are summed up
+    # (multiplying the zoom factors) and applied once per zoomInterval,
+    # so a burst of touchpad events costs a single transform update and
+    # repaint. Events at a different mouse position flush the pending zoom
+    # first, so each zoom keeps its own anchor.
     def wheelEvent(self, ev):
         y = ev.angleDelta().y()
         if y:
-            z = 1.05**(y / 120.)
             # Remove the slider-handle shift correction, b/c none of the other
             # widgets know about it. If we have the mouse directly over a tick
             # during a zoom, it should appear as if we are doing zoom relative
             # to the ticks which live in axis pixel-space, not slider
             # pixel-space.
-            self.sigZoom.emit(z, ev.x() - self.proxy.slider.handleWidth()/2)
-            self.update()
+            x = ev.x() - self.proxy.slider.handleWidth()/2
+            if self.zoomAnchor is not None and x != self.zoomAnchor:
+                self.flushZoom()
+            if self.zoomAnchor is not None:
+                self.mergedZoomEvents += 1
+            self.zoomAnchor = x
+            self.zoomDelta += y
+            if not self.zoomTimer.isActive():
+                self.zoomTimer.start()
         ev.accept()
 
+    def flushZoom(self):
+        self.zoomTimer.stop()
+        if self.zoomAnchor is None:
+            return
+        delta = self.zoomDelta
+        z = 1.05**(delta / 120.)
+        x = self.zoomAnchor
+        self.zoomDelta = 0
+        self.zoomAnchor = None
+        if z != 1:
+            self.sigZoom.emit(z, x)
+            self.zoomPrediction = delta, x
+            self.update()
+
+    # The next zoom of a burst most likely uses the same wheel delta and
+    # anchor. The tick layouts of the next few such views, in both
+    # directions, are computed in the background, so that painting them is
+    # a cache hit. The views are predicted with the same factors as
+    # flushZoom and the same transform operations as ScanProxy.handleZoom
+    # and drawAxis, so the cache keys match exactly.
+    def prefetchZoom(self, delta, x):
+        levels = []
+        for factor in 1.05**(delta / 120.), 1.05**(-delta / 120.):
+            transform = self.proxy.realToPixelTransform
+            views = []
+            for i in range(self.zoomPrefetch):
+                transform = transform.zoom(factor, x)
+                views.append((transform.inverse(0),
+                              transform.inverse(self.width())))
+            levels.append(views)
+        # nearest levels first
+        self.prefetcher.submit(v for level in zip(*levels) for v in level)
+
+
+# Cache of the widths of label strings in each font, shared by all
+# ScanAxes in the process. Panning and zooming keep producing the same
+# labels, so measuring them is mostly a dictionary lookup.
+class LabelWidths:
+    maxSize = 4096
+
+    def __init__(self):
+        self.metrics = {}
+        self.widths = {}
+
+    def __call__(self, font, labels):
+        key = font.key()
+        metrics = self.metrics.get(key)
+        if metrics is None:
+            metrics = self.metrics[key] = QtGui.QFontMetricsF(font)
+        widths = []
+        for label in labels:
+            width = self.widths.get((key, label))
+            if width is None:
+                if len(self.widths) >= self.maxSize:
+                    self.widths.clear()
+                width = metrics.horizontalAdvance(label)
+                self.widths[(key, label)] = width
+            widths.append(width)
+        return widths
+
+
+labelWidths = LabelWidths()
+
+
+# Snapshot of the slider sub-control geometry that the conversions between
+# pixel and range values need.
+class SliderGeometry:
+    def __init__(self, groove, handle, upsideDown):
+        self.grooveX = groove.x()
+        self.handleWidth = handle.width()
+        self.sliderMin = groove.x()
+        # For historical reasons right() returns left()+width() - 1
+        # x() is equivalent to left().
+        self.sliderMax = groove.right() - handle.width() + 1
+        self.handleTop = handle.y()
+        self.handleHeight = handle.height()
+        self.upsideDown = upsideDown
+
+
+# The fake sliders carrying the handle stylesheets, shared by all
+# ScanSliders in the process. They are created for the first user and
+# deleted once the last one is destroyed.
+class HandleStyles:
+    def __init__(self, minStyle, maxStyle):
+        self.styleSheets = minStyle, maxStyle
+        self.sliders = None
+        self.users = 0
+
+    def acquire(self):
+        if self.sliders is None:
+            self.sliders = tuple(QtWidgets.QSlider()
+                                 for styleSheet in self.styleSheets)
+            for slider, styleSheet in zip(self.sliders, self.styleSheets):
+                slider.setStyleSheet(styleSheet)
+        self.users += 1
+        return self.sliders
+
+    def release(self):
+        self.users -= 1
+        if self.users == 0:
+            # The sliders have no parent; dropping them deletes them.
+            self.sliders = None
+
 
 # Basic ideas from https://gist.github.com/Riateche/27e36977f7d5ea72cf4f
 class ScanSlider(QtWidgets.QSlider):
-    sigMinMoved = QtCore.pyqtSignal(int)
-    sigMaxMoved = QtCore.pyqtSignal(int)
+    sigMinMoved = QtCore.pyqtSignal(float)
+    sigMaxMoved = QtCore.pyqtSignal(float)
     noSlider, minSlider, maxSlider = range(3)
     maxStyle = "QSlider::handle::horizontal {background:#E00000}"
     minStyle = "QSlider::handle::horizontal {background:#0000E0}"
+    instrument = instrumentation.null
 
     def __init__(self):
         QtWidgets.QSlider.__init__(self, QtCore.Qt.Horizontal)
@@ -72,100 +431,137 @@ class ScanSlider(QtWidgets.QSlider):
         self.lowerPressed = QtWidgets.QStyle.SC_None
         self.firstMovement = False  # State var for handling slider overlap.
         self.blockTracking = False
-
-        # We need fake sliders to keep around so that we can dynamically
-        # set the stylesheets for drawing each slider later. See paintEvent.
-        self.dummyMinSlider = QtWidgets.QSlider()
-        self.dummyMaxSlider = QtWidgets.QSlider()
-        self.dummyMinSlider.setStyleSheet(ScanSlider.minStyle)
-        self.dummyMaxSlider.setStyleSheet(ScanSlider.maxStyle)
+        self.geometryCache = None
+        self.handleStyles = None
+        # Where each handle was last painted, see updateHandle().
+        self.paintedRects = {}
+
+    # We need fake sliders to keep around so that we can dynamically
+    # set the stylesheets for drawing each slider later. See paintEvent.
+    # They are shared by all ScanSliders and only acquired when first
+    # painting, which keeps constructing (possibly never shown) ScanSliders
+    # cheap.
+    def acquireHandleStyles(self):
+        if self.handleStyles is None:
+            self.handleStyles = handleStyles.acquire()
+            self.destroyed.connect(handleStyles.release)
 
     # We basically superimpose two QSliders on top of each other, discarding
     # the state that remains constant between the two when drawing.
     # Everything except the handles remain constant.
     def initHandleStyleOption(self, opt, handle):
         self.initStyleOption(opt)
+        # Range values are sub-pixel floats; the style only draws whole
+        # pixels.
         if handle == ScanSlider.minSlider:
-            opt.sliderPosition = self.minPos
-            opt.sliderValue = self.minVal
+            opt.sliderPosition = round(self.minPos)
+            opt.sliderValue = round(self.minVal)
         elif handle == ScanSlider.maxSlider:
-            opt.sliderPosition = self.maxPos
-            opt.sliderValue = self.maxVal
+            opt.sliderPosition = round(self.maxPos)
+            opt.sliderValue = round(self.maxVal)
         else:
             pass  # AssertionErrors
 
-    # We get the range of each slider separately.
+    # Querying the style for sub-control rects is expensive and the answers
+    # only change on resize, style, layout direction or range changes, so
+    # keep a snapshot of them around until then.
+    def sliderGeometry(self):
+        if self.geometryCache is None:
+            opt = QtWidgets.QStyleOptionSlider()
+            self.initStyleOption(opt)
+            gr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
+                                             QtWidgets.QStyle.SC_SliderGroove,
+                                             self)
+            sr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
+                                             QtWidgets.QStyle.SC_SliderHandle,
+                                             self)
+            self.geometryCache = SliderGeometry(gr, sr, opt.upsideDown)
+        return self.geometryCache
+
+    def invalidateGeometry(self):
+        self.geometryCache = None
+        self.paintedRects.clear()
+
+    # The rect the style draws a handle in, without asking the style. Like
+    # the style, this places the handle at its rounded position.
+    def handleRect(self, handle):
+        g = self.sliderGeometry()
+        if handle == ScanSlider.minSlider:
+            pos = round(self.minPos)
+        else:
+            pos = round(self.maxPos)
+        x = g.sliderMin + QtWidgets.QStyle.sliderPositionFromValue(
+            self.minimum(), self.maximum(), pos, g.sliderMax - g.sliderMin,
+            g.upsideDown)
+        return QtCore.QRect(x, g.handleTop, g.handleWidth, g.handleHeight)
+
+    # Moving a handle only invalidates the rect it was last painted in and
+    # the one it will be painted in next, not the whole slider.
+    def updateHandle(self, handle):
+        old = self.paintedRects.get(handle)
+        if old is None:
+            self.update()
+        else:
+            self.update(old.united(self.handleRect(handle)))
+
+    # The range of the slider is the usable width of the groove in pixels,
+    # so range values map 1:1 to pixels. The handle positions are not
+    # stretched along: before the first resize they refer to a made-up
+    # range. The proxy places them anew from the scan on rangeChanged.
+    def updateRange(self):
+        self.invalidateGeometry()
+        span = self.effectiveWidth()
+        if span > 0:
+            self.setRange(0, span)
+
+    def resizeEvent(self, ev):
+        self.updateRange()
+        QtWidgets.QSlider.resizeEvent(self, ev)
+
+    def changeEvent(self, ev):
+        if ev.type() in (QtCore.QEvent.StyleChange,
+                         QtCore.QEvent.LayoutDirectionChange):
+            self.updateRange()
+        QtWidgets.QSlider.changeEvent(self, ev)
+
+    def sliderChange(self, change):
+        if change == QtWidgets.QAbstractSlider.SliderRangeChange:
+            self.invalidateGeometry()
+        QtWidgets.QSlider.sliderChange(self, change)
+
+    # We get the range of each slider separately. Unlike
+    # QStyle.sliderValueFromPosition(), this does not quantize to integer
+    # range values.
     def pixelPosToRangeValue(self, pos):
-        opt = QtWidgets.QStyleOptionSlider()
-        self.initStyleOption(opt)
-
-        gr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
-                                         QtWidgets.QStyle.SC_SliderGroove,
-                                         self)
-        sr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
-                                         QtWidgets.QStyle.SC_SliderHandle,
-                                         self)
-
-        sliderLength = sr.width()
-        sliderMin = gr.x()
-        # For historical reasons right() returns left()+width() - 1
-        # x() is equivalent to left().
-        sliderMax = gr.right() - sliderLength + 1
-        return QtWidgets.QStyle.sliderValueFromPosition(
-            self.minimum(), self.maximum(), pos - sliderMin,
-            sliderMax - sliderMin, opt.upsideDown)
+        g = self.sliderGeometry()
+        span = g.sliderMax - g.sliderMin
+        val = min(max(pos - g.sliderMin, 0), span)
+        if g.upsideDown:
+            val = span - val
+        # The groove and the range only agree once updateRange() ran.
+        return min(self.minimum() + val, self.maximum())
 
     def rangeValueToPixelPos(self, val):
-        opt = QtWidgets.QStyleOptionSlider()
-        self.initStyleOption(opt)
-
-        gr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
-                                         QtWidgets.QStyle.SC_SliderGroove,
-                                         self)
-        sr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
-                                         QtWidgets.QStyle.SC_SliderHandle,
-                                         self)
-
-        sliderLength = sr.width()
-        sliderMin = gr.x()
-        sliderMax = gr.right() - sliderLength + 1
-
-        pixel = QtWidgets.QStyle.sliderPositionFromValue(
-            self.minimum(), self.maximum(), val, sliderMax - sliderMin,
-            opt.upsideDown)
+        g = self.sliderGeometry()
+        pixel = val - self.minimum()
+        if g.upsideDown:
+            pixel = g.sliderMax - g.sliderMin - pixel
         return pixel
 
     # When calculating conversions to/from pixel space, not all of the slider's
     # width is actually usable, because the slider handle has a nonzero width.
     # We use this function as a helper when the axis needs slider information.
     def handleWidth(self):
-        opt = QtWidgets.QStyleOptionSlider()
-        self.initStyleOption(opt)
-        sr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
-                                         QtWidgets.QStyle.SC_SliderHandle,
-                                         self)
-        return sr.width()
+        return self.sliderGeometry().handleWidth
 
     def effectiveWidth(self):
-        opt = QtWidgets.QStyleOptionSlider()
-        self.initStyleOption(opt)
-        gr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
-                                         QtWidgets.QStyle.SC_SliderGroove,
-                                         self)
-        sliderLength = self.handleWidth()
-        sliderMin = gr.x()
-        sliderMax = gr.right() - sliderLength + 1
-        return sliderMax - sliderMin
+        g = self.sliderGeometry()
+        return g.sliderMax - g.sliderMin
 
     # If groove and axis are not aligned (and they should be), we can use
     # this function to calculate the offset between them.
     def grooveX(self):
-        opt = QtWidgets.QStyleOptionSlider()
-        self.initStyleOption(opt)
-        gr = self.style().subControlRect(QtWidgets.QStyle.CC_Slider, opt,
-                                         QtWidgets.QStyle.SC_SliderGroove,
-                                         self)
-        return gr.x()
+        return self.sliderGeometry().grooveX
 
     def handleMousePress(self, pos, control, val, handle):
         opt = QtWidgets.QStyleOptionSlider()
@@ -189,12 +585,13 @@ class ScanSlider(QtWidgets.QSlider):
             self.update(sr)
         return control
 
-    def drawHandle(self, painter, handle):
+    def drawHandle(self, painter, dummy, handle):
         opt = QtWidgets.QStyleOptionSlider()
         self.initStyleOption(opt)
         self.initHandleStyleOption(opt, handle)
         opt.subControls = QtWidgets.QStyle.SC_SliderHandle
-        painter.drawComplexControl(QtWidgets.QStyle.CC_Slider, opt)
+        dummy.style().drawComplexControl(QtWidgets.QStyle.CC_Slider, opt,
+                                         painter, dummy)
 
     # def triggerAction(self, action, slider):
     #     if action == QtWidgets.QAbstractSlider.SliderSingleStepAdd:
@@ -222,19 +619,20 @@ class ScanSlider(QtWidgets.QSlider):
             if low != self.minVal:
                 self.minVal = low
                 self.minPos = low
+                self.updateHandle(ScanSlider.minSlider)
                 # emit
             if high != self.maxVal:
                 self.maxVal = high
                 self.maxPos = high
+                self.updateHandle(ScanSlider.maxSlider)
                 # emit
             # emit spanChanged
-            self.update()
 
     def setLowerPosition(self, val):
         if val != self.minPos:
             self.minPos = val
             if not self.hasTracking():
-                self.update()
+                self.updateHandle(ScanSlider.minSlider)
             if self.isSliderDown():
                 self.sigMinMoved.emit(self.minPos)
             if self.hasTracking() and not self.blockTracking:
@@ -244,7 +642,7 @@ class ScanSlider(QtWidgets.QSlider):
         if val != self.maxPos:
             self.maxPos = val
             if not self.hasTracking():
-                self.update()
+                self.updateHandle(ScanSlider.maxSlider)
             if self.isSliderDown():
                 self.sigMaxMoved.emit(self.maxPos)
             if self.hasTracking() and not self.blockTracking:
@@ -312,17 +710,22 @@ class ScanSlider(QtWidgets.QSlider):
         self.upperPressed = QtWidgets.QStyle.SC_None
 
     def paintEvent(self, ev):
-        # Use QStylePainters to make redrawing as painless as possible.
-        painter = QtWidgets.QStylePainter(self)
-        # Paint on the custom widget, using the attributes of the fake
-        # slider references we keep around. setStyleSheet within paintEvent
+        with self.instrument.time("slider.paint"):
+            self.drawWidget(ev.rect())
+
+    # Only the dirty rect is repainted, usually the old and new rects of a
+    # moving handle. Handles outside of it are skipped.
+    def drawWidget(self, dirty):
+        self.acquireHandleStyles()
+        # A single painter draws everything. The handles are drawn with the
+        # styles of the shared fake sliders. setStyleSheet within paintEvent
         # leads to heavy performance penalties (and recursion?).
         # QPalettes would be nicer to use, since palette entries can be set
         # individually for each slider handle, but Windows 7 does not
         # use them. This seems to be the only way to override the colors
         # regardless of platform.
-        minPainter = QtWidgets.QStylePainter(self, self.dummyMinSlider)
-        maxPainter = QtWidgets.QStylePainter(self, self.dummyMaxSlider)
+        painter = QtGui.QPainter(self)
+        painter.setClipRect(dirty)
 
         # Groove
         opt = QtWidgets.QStyleOptionSlider()
@@ -330,26 +733,37 @@ class ScanSlider(QtWidgets.QSlider):
         opt.sliderValue = 0
         opt.sliderPosition = 0
         opt.subControls = QtWidgets.QStyle.SC_SliderGroove
-        painter.drawComplexControl(QtWidgets.QStyle.CC_Slider, opt)
+        self.style().drawComplexControl(QtWidgets.QStyle.CC_Slider, opt,
+                                        painter, self)
 
         # Handles
-        self.drawHandle(minPainter, ScanSlider.minSlider)
-        self.drawHandle(maxPainter, ScanSlider.maxSlider)
+        minDummy, maxDummy = self.handleStyles
+        for dummy, handle in ((minDummy, ScanSlider.minSlider),
+                              (maxDummy, ScanSlider.maxSlider)):
+            rect = self.handleRect(handle)
+            self.paintedRects[handle] = rect
+            if rect.intersects(dirty):
+                self.drawHandle(painter, dummy, handle)
+
+
+handleStyles = HandleStyles(ScanSlider.minStyle, ScanSlider.maxStyle)
 
 
 # real (Sliders) => pixel (one pixel movement of sliders would increment by X)
-# => range (minimum granularity that sliders understand).
+# => range (sub-pixel float position of the sliders within the groove).
 class ScanProxy(QtCore.QObject):
     sigMinMoved = QtCore.pyqtSignal(float)
     sigMaxMoved = QtCore.pyqtSignal(float)
+    # Start, stop or number of points changed, by any means.
+    sigChanged = QtCore.pyqtSignal()
+    instrument = instrumentation.null
 
     def __init__(self, slider, axis):
         QtCore.QObject.__init__(self)
         self.axis = axis
         self.slider = slider
-        self.realMin = 0
-        self.realMax = 0
-        self.numPoints = 10
+        self.model = ScanModel(0, 0, 10)
+        self.lastScan = None
 
         # Transform that maps the spinboxes to a pixel position on the
         # axis. 0 to axis.width() exclusive indicate positions which will be
@@ -360,29 +774,80 @@ class ScanProxy(QtCore.QObject):
         self.realToPixelTransform = self.calculateNewRealToPixel(
             -self.axis.width()/2, 1.0)
         self.invalidOldSizeExpected = True
+        # Whether the first resize should fit the view to the scan, see
+        # setModel().
+        self.fitOnResize = False
         self.axis.installEventFilter(self)
+        self.slider.rangeChanged.connect(lambda *args: self.placeHandles())
+
+    # The scan and the view are kept in the ScanModel, which may be
+    # replaced with setModel().
+    @property
+    def realMin(self):
+        return self.model.start
+
+    @realMin.setter
+    def realMin(self, val):
+        self.model.start = val
+
+    @property
+    def realMax(self):
+        return self.model.stop
+
+    @realMax.setter
+    def realMax(self, val):
+        self.model.stop = val
+
+    @property
+    def numPoints(self):
+        return self.model.npoints
+
+    @numPoints.setter
+    def numPoints(self, val):
+        self.model.npoints = val
+
+    @property
+    def realToPixelTransform(self):
+        return self.model.view
+
+    @realToPixelTransform.setter
+    def realToPixelTransform(self, val):
+        self.model.view = val
+
+    # Edit another model. A model that was never shown gets a view that
+    # fits its scan, or takes over the current view if its scan is empty.
+    # Before the axis has its size, it borrows the current view until the
+    # first resize fits it. Otherwise its view is kept, also across the
+    # first resize.
+    def setModel(self, model):
+        self.fitOnResize = False
+        if model.view is None:
+            model.view = self.realToPixelTransform
+            if model.start != model.stop:
+                if self.invalidOldSizeExpected:
+                    self.fitOnResize = True
+                else:
+                    self.model = model
+                    model.view = self.fitTransform()
+        else:
+            self.invalidOldSizeExpected = False
+        self.model = model
+        self.placeHandles()
 
     # What real value should map to the axis/slider left? This doesn't depend
     # on any public members so we can make decisions about centering during
     # resize and zoom events.
     def calculateNewRealToPixel(self, targetLeft, targetScale):
-        return QtGui.QTransform.fromScale(targetScale, 1).translate(
-            -targetLeft, 0)
+        return AffineMap(targetLeft, targetScale)
 
     # pixel vals for sliders: 0 to slider_width - 1
+    # Scalars and NumPy arrays of real values are both accepted.
     def realToPixel(self, val):
-        return (QtCore.QPointF(val, 0) * self.realToPixelTransform).x()
+        return self.realToPixelTransform.map(val)
 
     # Get a point from pixel units to what the sliders display.
     def pixelToReal(self, val):
-        (revXform, invertible) = self.realToPixelTransform.inverted()
-        if not invertible:
-            revXform = (QtGui.QTransform.fromTranslate(
-                -self.realToPixelTransform.dx(), 0) *
-                        QtGui.QTransform.fromScale(
-                            1/self.realToPixelTransform.m11(), 0))
-        realPoint = QtCore.QPointF(val, 0) * revXform
-        return realPoint.x()
+        return self.realToPixelTransform.inverse(val)
 
     def rangeToReal(self, val):
         # gx = self.slider.grooveX()
@@ -395,43 +860,110 @@ class ScanProxy(QtCore.QObject):
         pixelVal = self.realToPixel(val)
         return self.slider.pixelPosToRangeValue(pixelVal)
 
+    # Pixel positions of the scan points within [left, right], as a list of
+    # whole pixels. The points are evenly spaced, so only the visible ones
+    # are generated. Where they are closer than a pixel, every pixel
+    # column between the first and the last visible point stands in for
+    # the points it contains. Either way the number of positions is
+    # bounded by the axis width, not by numPoints. Only many sparse points
+    # are mapped with NumPy.
+    def pointPixels(self, left, right):
+        n = self.numPoints
+        if n < 1:
+            return []
+        start = self.realToPixel(self.realMin)
+        if n > 1:
+            step = (self.realMax - self.realMin)/(n - 1)
+            pitch = step*self.realToPixelTransform.scale
+        if n == 1 or not pitch:
+            return [float(round(start))] if left <= start <= right else []
+        first, last = sorted(((left - start)/pitch, (right - start)/pitch))
+        first = math.ceil(max(first, 0))
+        last = math.floor(min(last, n - 1))
+        if first > last:
+            return []
+        if abs(pitch) < 1:
+            lo, hi = sorted(round(self.realToPixel(self.realMin + i*step))
+                            for i in (first, last))
+            return [float(p) for p in range(lo, hi + 1)]
+        if last - first < 64:
+            return [float(round(self.realToPixel(self.realMin + i*step)))
+                    for i in range(first, last + 1)]
+        index = np.arange(first, last + 1)
+        return np.round(self.realToPixel(self.realMin + index*step)).tolist()
+
+    # Zooming re-places the handles without changing the scan, so only
+    # emit sigChanged when the scan actually differs.
+    def checkChanged(self):
+        scan = self.realMin, self.realMax, self.numPoints
+        if scan != self.lastScan:
+            self.lastScan = scan
+            self.sigChanged.emit()
+
+    def setNumPoints(self, val):
+        self.numPoints = val
+        self.axis.update()
+        self.checkChanged()
+
     def moveMax(self, val):
         sliderX = self.realToRange(val)
         self.slider.setUpperPosition(sliderX)
         self.realMax = val
+        self.axis.update()
+        self.checkChanged()
 
     def moveMin(self, val):
         sliderX = self.realToRange(val)
         self.slider.setLowerPosition(sliderX)
         self.realMin = val
+        self.axis.update()
+        self.checkChanged()
+
+    # Put the handles where the scan is in the current view and range.
+    def placeHandles(self):
+        self.moveMax(self.realMax)
+        self.moveMin(self.realMin)
 
     def handleMaxMoved(self, rangeVal):
-        self.sigMaxMoved.emit(self.rangeToReal(rangeVal))
+        self.realMax = self.rangeToReal(rangeVal)
+        self.axis.update()
+        self.sigMaxMoved.emit(self.realMax)
+        self.checkChanged()
 
     def handleMinMoved(self, rangeVal):
-        self.sigMinMoved.emit(self.rangeToReal(rangeVal))
+        self.realMin = self.rangeToReal(rangeVal)
+        self.axis.update()
+        self.sigMinMoved.emit(self.realMin)
+        self.checkChanged()
 
     def handleZoom(self, zoomFactor, mouseXPos):
-        # We need to figure out what new value is to be centered in the axis
-        # display.
-        # Halfway between the mouse zoom and the oldCenter should be fine.
-        newScale = self.realToPixelTransform.m11() * zoomFactor
-        refReal = self.pixelToReal(mouseXPos)
-        newLeft = refReal - mouseXPos/newScale
-        self.realToPixelTransform = self.calculateNewRealToPixel(
-            newLeft, newScale)
-        self.moveMax(self.realMax)
-        self.moveMin(self.realMin)
+        with self.instrument.time("proxy.zoom"):
+            # The real value under the mouse stays put. Composing the zoom
+            # within the map does not round its left edge.
+            self.realToPixelTransform = self.realToPixelTransform.zoom(
+                zoomFactor, mouseXPos)
+            self.placeHandles()
+
+    # The view that shows the scan in the middle third of the axis, or of
+    # `width` pixels.
+    def fitTransform(self, width=None):
+        if width is None:
+            width = self.slider.effectiveWidth()
+        currRangeReal = abs(self.realMax - self.realMin)
+        newScale = width/(3*currRangeReal)
+        newLeft = self.realMin - width/(3*newScale)
+        return self.calculateNewRealToPixel(newLeft, newScale)
+
+    # Move the view, and with it the handles, by dx pixels.
+    def handlePan(self, dx):
+        with self.instrument.time("proxy.pan"):
+            self.realToPixelTransform = self.realToPixelTransform.pan(dx)
+            self.placeHandles()
 
     def zoomToFit(self):
-        currRangeReal = abs(self.realMax - self.realMin)
-        newScale = self.slider.effectiveWidth()/(3*currRangeReal)
-        newLeft = self.realMin - self.slider.effectiveWidth()/(3*newScale)
-        self.realToPixelTransform = self.calculateNewRealToPixel(
-            newLeft, newScale)
+        self.realToPixelTransform = self.fitTransform()
         self.printTransform()
-        self.moveMax(self.realMax)
-        self.moveMin(self.realMin)
+        self.placeHandles()
         self.axis.update()
 
     def fitToView(self):
@@ -452,41 +984,110 @@ class ScanProxy(QtCore.QObject):
             return False
         if ev.type() != QtCore.QEvent.Resize:
             return False
-        oldLeft = self.pixelToReal(0)
-        if ev.oldSize().isValid():
-            refWidth = ev.oldSize().width() - self.slider.handleWidth()
-            refRight = self.pixelToReal(refWidth)
-            newWidth = ev.size().width() - self.slider.handleWidth()
-            assert refRight > oldLeft
-            newScale = newWidth/(refRight - oldLeft)
-        else:
-            # TODO: self.axis.width() is invalid during object
-            # construction. The width will change when placed in a
-            # layout WITHOUT a resizeEvent. Why?
-            oldLeft = -ev.size().width()/2
-            newScale = 1.0
-            self.invalidOldSizeExpected = False
-        self.realToPixelTransform = self.calculateNewRealToPixel(
-            oldLeft, newScale)
+        with self.instrument.time("proxy.resize"):
+            if ev.oldSize().isValid():
+                # Keep the left edge and stretch the old view over the new
+                # width.
+                refWidth = ev.oldSize().width() - self.slider.handleWidth()
+                newWidth = ev.size().width() - self.slider.handleWidth()
+                assert refWidth > 0
+                self.realToPixelTransform = self.realToPixelTransform.zoom(
+                    newWidth/refWidth)
+            elif self.invalidOldSizeExpected:
+                # TODO: self.axis.width() is invalid during object
+                # construction. The width will change when placed in a
+                # layout WITHOUT a resizeEvent. Why?
+                if self.fitOnResize:
+                    # The slider may not have its new width yet.
+                    self.realToPixelTransform = self.fitTransform(
+                        ev.size().width() - self.slider.handleWidth())
+                else:
+                    self.realToPixelTransform = \
+                        self.calculateNewRealToPixel(
+                            -ev.size().width()/2, 1.0)
+                self.invalidOldSizeExpected = False
+                self.fitOnResize = False
+            # The slider resizes independently, before or after the axis.
+            # Whichever comes last places the handles in the final view
+            # and range.
+            self.placeHandles()
         # assert self.pixelToReal(0) == oldLeft, \
         # "{}, {}".format(self.pixelToReal(0), oldLeft)
-        # Slider will update independently, making sure that the old
-        # slider positions are preserved. Because of this, we can be
-        # confident that the new slider position will still map to the
-        # same positions in the new axis-space.
         return False
 
     def printTransform(self):
-        print("m11: {}, dx: {}".format(
-            self.realToPixelTransform.m11(), self.realToPixelTransform.dx()))
-        (inverted, invertible) = self.realToPixelTransform.inverted()
-        print("m11: {}, dx: {}, singular: {}".format(
-            inverted.m11(), inverted.dx(), not invertible))
+        print("left: {}, scale: {}".format(
+            self.realToPixelTransform.left, self.realToPixelTransform.scale))
+
+
+# Forwards the values dragged by a slider handle to `emit` according to the
+# ScanWidget emission policy. Outside of a drag, and at the latest when
+# the drag ends, the last value is always delivered.
+class EmissionThrottle(QtCore.QObject):
+    instrument = instrumentation.null
+
+    def __init__(self, emit, name):
+        QtCore.QObject.__init__(self)
+        self.emit = emit
+        self.name = name
+        self.policy = ScanWidget.emitImmediate
+        self.pending = None
+        self.dragging = False
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(50)
+        self.timer.timeout.connect(self.handleTimeout)
+
+    def setPolicy(self, policy, interval):
+        self.flush()
+        self.policy = policy
+        self.timer.setInterval(interval)
+
+    def push(self, val):
+        if self.policy == ScanWidget.emitImmediate or not self.dragging:
+            self.pending = val
+            self.flush()
+            return
+        self.pending = val
+        if self.policy == ScanWidget.emitRateLimited:
+            # Leading edge right away, then at most one per interval.
+            if not self.timer.isActive():
+                self.flush()
+                self.timer.start()
+        elif self.policy == ScanWidget.emitDebounced:
+            # Trailing edge once the handle rests for an interval.
+            self.timer.start()
+        # emitOnRelease waits for release().
+
+    def handleTimeout(self):
+        if self.pending is None:
+            return
+        self.flush()
+        if self.policy == ScanWidget.emitRateLimited:
+            self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        if self.pending is not None:
+            val, self.pending = self.pending, None
+            with self.instrument.time(self.name):
+                self.emit(val)
+
+    def press(self):
+        self.dragging = True
+
+    def release(self):
+        self.dragging = False
+        self.flush()
 
 
 class ScanWidget(QtWidgets.QWidget):
     sigMinMoved = QtCore.pyqtSignal(float)
     sigMaxMoved = QtCore.pyqtSignal(float)
+    # How sigMinMoved/sigMaxMoved follow a handle drag: on every mouse
+    # move, at most once per interval, once the handle rests for an
+    # interval, or only when it is released.
+    emitImmediate, emitRateLimited, emitDebounced, emitOnRelease = range(4)
 
     def __init__(self):
         QtWidgets.QWidget.__init__(self)
@@ -510,14 +1111,37 @@ class ScanWidget(QtWidgets.QWidget):
         # Connect signals
         slider.sigMaxMoved.connect(self.proxy.handleMaxMoved)
         slider.sigMinMoved.connect(self.proxy.handleMinMoved)
-        self.proxy.sigMaxMoved.connect(self.sigMaxMoved)
-        self.proxy.sigMinMoved.connect(self.sigMinMoved)
+        self.minThrottle = EmissionThrottle(self.sigMinMoved.emit,
+                                            "signal.sigMinMoved")
+        self.maxThrottle = EmissionThrottle(self.sigMaxMoved.emit,
+                                            "signal.sigMaxMoved")
+        for throttle in self.minThrottle, self.maxThrottle:
+            slider.sliderPressed.connect(throttle.press)
+            slider.sliderReleased.connect(throttle.release)
+        self.proxy.sigMaxMoved.connect(self.maxThrottle.push)
+        self.proxy.sigMinMoved.connect(self.minThrottle.push)
         axis.sigZoom.connect(self.proxy.handleZoom)
+        axis.sigPan.connect(self.proxy.handlePan)
         fitViewButton.clicked.connect(self.fitToView)
         zoomFitButton.clicked.connect(self.zoomToFit)
 
         # Connect event observers.
 
+    # Slow listeners on sigMinMoved/sigMaxMoved can be shielded from
+    # every single mouse move during a drag. `interval` is in ms.
+    def setEmissionPolicy(self, policy, interval=50):
+        self.minThrottle.setPolicy(policy, interval)
+        self.maxThrottle.setPolicy(policy, interval)
+
+    # Time paint events, ticker calls, zooms, resizes and signal emissions
+    # with an instrumentation.Instrument. None turns instrumentation off.
+    def setInstrument(self, instrument=None):
+        if instrument is None:
+            instrument = instrumentation.null
+        for obj in (self.proxy, self.proxy.axis, self.proxy.slider,
+                    self.minThrottle, self.maxThrottle):
+            obj.instrument = instrument
+
     # Spinbox and button slots. Any time the spinboxes change, ScanWidget
     # mirrors it and passes the information to the proxy.
     def setMax(self, val):
@@ -527,7 +1151,7 @@ class ScanWidget(QtWidgets.QWidget):
         self.proxy.moveMin(val)
 
     def setNumPoints(self, val):
-        pass
+        self.proxy.setNumPoints(val)
 
     def zoomToFit(self):
         self.proxy.zoomToFit()
@@ -537,3 +1161,90 @@ class ScanWidget(QtWidgets.QWidget):
 
     def reset(self):
         self.proxy.reset()
+
+    # The ScanModel this widget edits. Thousands of models can be edited
+    # by a few widgets, see ScanDelegate.
+    def model(self):
+        return self.proxy.model
+
+    def setModel(self, model):
+        self.proxy.setModel(model)
+
+    # The scan points as currently configured. points() returns them all
+    # at once. iterPoints() streams them in arrays of at most chunkSize
+    # points, optionally in a random order given by seed, without ever
+    # holding the whole scan in memory.
+    def scan(self):
+        return LinearScan(self.proxy.realMin, self.proxy.realMax,
+                          self.proxy.numPoints)
+
+    def points(self):
+        return self.scan().array()
+
+    def iterPoints(self, chunkSize=1 << 16, shuffle=False, seed=None):
+        if shuffle:
+            return self.scan().shuffled(chunkSize, seed)
+        return self.scan().chunks(chunkSize)
+
+    # Asynchronous iterator over snapshots of the scan, see
+    # changes.ScanChanges:
+    #     async for scan in widget.changes():
+    #         submit(scan.start, scan.stop, scan.num)
+    def changes(self, maxsize=16):
+        from changes import ScanChanges
+        return ScanChanges(self.proxy.sigChanged, self.scan, maxsize)
+
+
+# Item delegate that edits the ScanModel in the modelRole data of the items
+# with ScanWidgets. Closed editors are not deleted but kept, up to poolSize,
+# and reused for the next item. Only as many ScanWidgets exist as items are
+# edited at once, e.g. the visible rows of a view that opens persistent
+# editors for them, however many models there are.
+class ScanDelegate(QtWidgets.QStyledItemDelegate):
+    modelRole = QtCore.Qt.UserRole
+    poolSize = 8
+
+    def __init__(self, parent=None):
+        QtWidgets.QStyledItemDelegate.__init__(self, parent)
+        self.pool = []
+        self.editorSize = None
+
+    def newEditor(self):
+        editor = ScanWidget()
+        editor.setAutoFillBackground(True)
+        # Changes are written to the model right away; let the item model
+        # know.
+        editor.proxy.sigChanged.connect(
+            lambda: self.commitData.emit(editor))
+        return editor
+
+    def createEditor(self, parent, option, index):
+        editor = self.pool.pop() if self.pool else self.newEditor()
+        editor.setParent(parent)
+        return editor
+
+    def destroyEditor(self, editor, index):
+        if len(self.pool) < self.poolSize:
+            editor.hide()
+            editor.setParent(None)
+            self.pool.append(editor)
+        else:
+            QtWidgets.QStyledItemDelegate.destroyEditor(self, editor, index)
+
+    def setEditorData(self, editor, index):
+        model = index.data(self.modelRole)
+        if model is not None and model is not editor.model():
+            editor.setModel(model)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.model(), self.modelRole)
+
+    def sizeHint(self, option, index):
+        if self.editorSize is None:
+            # Measure a ScanWidget once and keep it for the first editor.
+            editor = self.newEditor()
+            self.editorSize = editor.sizeHint()
+            self.pool.append(editor)
+        size = QtWidgets.QStyledItemDelegate.sizeHint(self, option, index)
+        return QtCore.QSize(max(size.width(), self.editorSize.width()),
+                            self.editorSize.height())
@@ -0,0 +1,182 @@
+"""
+Parallel correctness sweep of the alternative tick engines against the
+reference `Ticker`.
+
+The interval space is generated in shards. Shard `k` is reproducible from
+the seed and `k` alone: it uses one combination of `min_ticks` and
+`precision` and draws its intervals on logarithmic scales, half of them at
+random and half as chains of small pans. Shards are checked on a process
+pool. Every engine's ticks (bit for bit), prefix and labels are compared
+with those of the reference, and the first disagreements are reported.
+
+    python sweep.py -n 10000000
+    python sweep.py -n 100000 -e scalar --seed 3
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from ticker import Ticker, ScalarTicker, CachedTicker
+
+
+min_ticks = (2, 3, 4, 5, 10)
+precisions = (1, 2, 3, 4, 6)
+combinations = list(itertools.product(min_ticks, precisions))
+
+
+def intervals(seed, shard, size):
+    """
+    Return the `min_ticks`, `precision` and the interval arrays `a`, `b`
+    of a shard.
+    """
+    n, precision = combinations[shard % len(combinations)]
+    r = np.random.default_rng([seed, shard])
+    half = size//2
+    # random intervals: offsets across the double range (and exact zero),
+    # spans from wide to a few ulp of the offset
+    a = r.choice((-1., 1.), half)*10**r.uniform(-20, 20, half)
+    a[r.random(half) < .05] = 0.
+    w = np.maximum(10**r.uniform(-20, 20, half),
+                   abs(a)*10**r.uniform(-15, 0, half))
+    # chains of pans by up to a third of the span
+    chain = 8
+    starts = -(-(size - half)//chain)
+    c = r.choice((-1., 1.), starts)*10**r.uniform(-20, 20, starts)
+    v = np.maximum(10**r.uniform(-20, 20, starts),
+                   abs(c)*10**r.uniform(-14, 0, starts))
+    d = r.uniform(-.3, .3, (starts, chain))
+    d[:, 0] = 0.
+    c = (c[:, None] + np.cumsum(d, axis=1)*v[:, None]).ravel()
+    v = np.repeat(v, chain)
+    a = np.concatenate((a, c))[:size]
+    b = a + np.concatenate((w, v))[:size]
+    ok = np.isfinite(a) & np.isfinite(b) & (a < b)
+    return n, precision, a[ok], b[ok]
+
+
+def same(u, v):
+    """
+    Whether the `(ticks, prefix, labels)` `u` and `v` agree, ticks bit for
+    bit.
+    """
+    tu = np.asarray(u[0], dtype=np.float64)
+    tv = np.asarray(v[0], dtype=np.float64)
+    return (tu.shape == tv.shape and tu.tobytes() == tv.tobytes() and
+            u[1] == v[1] and u[2] == v[2])
+
+
+def run(engine, a, b):
+    """
+    Generate the results of `engine` on the intervals `[a[i], b[i][`, or
+    the types of the exceptions it raised.
+    """
+    for ai, bi in zip(a.tolist(), b.tolist()):
+        try:
+            yield engine(ai, bi)
+        except Exception as e:
+            yield type(e)
+
+
+def check(job):
+    """
+    Check one shard. Return the shard number, the number of intervals, the
+    number of disagreements per engine and the first `first` of them.
+    """
+    seed, shard, size, engines, first = job
+    n, precision, a, b = intervals(seed, shard, size)
+    results = list(run(Ticker(n, precision), a, b))
+    others = {}
+    if "scalar" in engines:
+        others["scalar"] = run(ScalarTicker(n, precision), a, b)
+    if "cached" in engines:
+        others["cached"] = run(CachedTicker(Ticker(n, precision)), a, b)
+    if "batch" in engines:
+        # The batch does not raise for single intervals; compare where the
+        # reference succeeds.
+        valid = np.array([not isinstance(r, type) for r in results],
+                         dtype=bool)
+        batch = Ticker(n, precision).batch(a[valid], b[valid])
+        index = np.cumsum(valid) - 1
+        others["batch"] = (batch[j] if v else r for j, v, r in zip(
+            index.tolist(), valid.tolist(), results))
+
+    counts = {}
+    found = []
+    for name, results_other in others.items():
+        counts[name] = 0
+        for i, (u, v) in enumerate(zip(results, results_other)):
+            if isinstance(u, type) or isinstance(v, type):
+                agree = u is v
+            else:
+                agree = same(u, v)
+            if not agree:
+                counts[name] += 1
+                if len(found) < first:
+                    found.append((shard, i, name, float(a[i]),
+                                  float(b[i]), n, precision, u, v))
+    return shard, len(a), counts, found
+
+
+def show(r):
+    if isinstance(r, type):
+        return "raises {}".format(r.__name__)
+    ticks, prefix, labels = r
+    return "{!r} {!r} {!r}".format(
+        np.asarray(ticks, dtype=np.float64).tolist(), prefix, labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", "--intervals", type=int, default=10**6,
+                        help="number of intervals to generate")
+    parser.add_argument("-s", "--shard-size", type=int, default=10000)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="worker processes")
+    parser.add_argument("-e", "--engine", action="append",
+                        choices=("scalar", "cached", "batch"),
+                        help="engines to check (default: all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--first", type=int, default=10,
+                        help="number of disagreements to report")
+    args = parser.parse_args()
+    engines = args.engine or ["scalar", "cached", "batch"]
+
+    shards = -(-args.intervals//args.shard_size)
+    jobs = [(args.seed, k, args.shard_size, engines, args.first)
+            for k in range(shards)]
+    total = 0
+    counts = dict.fromkeys(engines, 0)
+    found = []
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(args.jobs) as pool:
+        for i, (shard, size, c, f) in enumerate(
+                pool.imap_unordered(check, jobs), 1):
+            total += size
+            for name, m in c.items():
+                counts[name] += m
+            found.extend(f)
+            print("\r{}/{} shards, {} intervals, {:.0f} s".format(
+                i, shards, total, time.perf_counter() - t0),
+                end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+    for name in engines:
+        print("{:8s} {} of {} intervals disagree".format(
+            name, counts[name], total))
+    found.sort(key=lambda f: f[:2])
+    for shard, i, name, a, b, n, precision, u, v in found[:args.first]:
+        print("\nshard {} #{}: {} Ticker({}, {}) on [{!r}, {!r}[".format(
+            shard, i, name, n, precision, a, b))
+        print("  reference:", show(u))
+        print("  {:9s}".format(name + ":"), show(v))
+    sys.exit(1 if any(counts.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+
+from changes import ScanChanges
+
+
+class Signal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, slot):
+        self.slots.remove(slot)
+
+    def emit(self):
+        for slot in self.slots:
+            slot()
+
+
+class ScanChangesTest(unittest.TestCase):
+    def setUp(self):
+        self.signal = Signal()
+        self.state = 0
+
+    def _set(self, state):
+        self.state = state
+        self.signal.emit()
+
+    def test_coalesce(self):
+        async def run():
+            c = ScanChanges(self.signal, lambda: self.state)
+            self._set(1)
+            self.assertEqual(await c.__anext__(), 1)
+            for i in range(2, 100):
+                self._set(i)
+            self.assertEqual(await c.__anext__(), 99)
+            self.assertFalse(c.queue)
+            c.close()
+            self.assertEqual([s async for s in c], [])
+            self.assertFalse(self.signal.slots)
+        asyncio.run(run())
+
+    def test_drop_oldest(self):
+        async def run():
+            c = ScanChanges(self.signal, lambda: self.state, maxsize=3)
+            for i in range(10):
+                self._set(i)
+            self.assertEqual(c.dropped, 7)
+            c.close()
+            self.assertEqual([s async for s in c], [7, 8, 9])
+        asyncio.run(run())
+
+    def test_wait(self):
+        async def run():
+            c = ScanChanges(self.signal, lambda: self.state)
+            loop = asyncio.get_running_loop()
+            loop.call_later(.01, self._set, 1)
+            loop.call_later(.02, self._set, 2)
+            loop.call_later(.03, c.close)
+            self.assertEqual([s async for s in c], [1, 2])
+        asyncio.run(run())
@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+import unittest
+
+from instrumentation import Instrument, JsonlSink, RingBufferSink, null
+
+
+class InstrumentTest(unittest.TestCase):
+    def test_sinks(self):
+        ring = RingBufferSink(2)
+        calls = []
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "records.jsonl")
+            jsonl = JsonlSink(path)
+            i = Instrument(ring, calls.append, jsonl)
+            for name in "abc":
+                with i.time(name):
+                    pass
+            jsonl.close()
+            with open(path) as f:
+                lines = [json.loads(l) for l in f]
+        self.assertEqual([r["name"] for r in ring.records], ["b", "c"])
+        self.assertEqual([r["name"] for r in calls], ["a", "b", "c"])
+        self.assertEqual(lines, calls)
+        self.assertTrue(all(r["duration"] >= 0 for r in calls))
+        self.assertEqual(set(i.summary()), {"a", "b", "c"})
+        self.assertEqual(i.summary()["a"][0], 1)
+
+    def test_null(self):
+        with null.time("a"):
+            pass
+        self.assertFalse(null.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
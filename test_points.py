@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+
+from points import LinearScan, Permutation
+
+
+class LinearScanTest(unittest.TestCase):
+    def _scans(self):
+        for start, stop in ((0., 1.), (-3., 7.), (1., -1.), (2., 2.),
+                            (1e9, 1e9 + 1e-3), (0., 5e-324), (-1e300, 1e300),
+                            (0.1, 0.7)):
+            for num in (0, 1, 2, 3, 10, 101, 1000):
+                yield start, stop, num
+
+    def test_linspace(self):
+        for start, stop, num in self._scans():
+            with self.subTest(start=start, stop=stop, num=num):
+                x = LinearScan(start, stop, num).array()
+                np.testing.assert_array_equal(
+                    x, np.linspace(start, stop, num))
+
+    def test_chunks(self):
+        for start, stop, num in self._scans():
+            s = LinearScan(start, stop, num)
+            for size in (1, 7, 1000):
+                with self.subTest(start=start, stop=stop, num=num,
+                                  size=size):
+                    c = list(s.chunks(size))
+                    self.assertTrue(all(0 < len(x) <= size for x in c))
+                    np.testing.assert_array_equal(
+                        np.concatenate([np.empty(0)] + c), s.array())
+
+    def test_shuffled(self):
+        s = LinearScan(-1., 1., 1001)
+        x = np.concatenate(list(s.shuffled(64, seed=1)))
+        self.assertFalse(np.array_equal(x, s.array()))
+        np.testing.assert_array_equal(np.sort(x), s.array())
+        y = np.concatenate(list(s.shuffled(100, seed=1)))
+        np.testing.assert_array_equal(x, y)
+        z = np.concatenate(list(s.shuffled(64, seed=2)))
+        self.assertFalse(np.array_equal(x, z))
+
+    def test_large(self):
+        s = LinearScan(0., 1., 10**12)
+        x = next(s.chunks(10))
+        np.testing.assert_array_equal(x, np.arange(10)*(1/(10**12 - 1)))
+        x = next(s.shuffled(10, seed=0))
+        self.assertEqual(len(x), 10)
+        self.assertTrue(np.all((x >= 0) & (x <= 1)))
+
+    def test_permutation(self):
+        for n in (0, 1, 2, 3, 4, 5, 17, 64, 1000, 4097):
+            with self.subTest(n=n):
+                p = Permutation(n, seed=n)
+                x = p(np.arange(n, dtype=np.uint64))
+                np.testing.assert_array_equal(np.sort(x), np.arange(n))
@@ -0,0 +1,517 @@
+import os
+import random
+import unittest
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui, QtTest, QtWidgets  # noqa: E402
+
+from model import ScanModel  # noqa: E402
+from scanwidget import ScanWidget, ScanDelegate  # noqa: E402
+from scanwidget import EmissionThrottle, Prefetcher  # noqa: E402
+from transform import AffineMap  # noqa: E402
+
+
+app = None
+
+
+def setUpModule():
+    global app
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class PointPixelsTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = ScanWidget()
+        self.proxy = self.widget.proxy
+
+    def tearDown(self):
+        self.widget.deleteLater()
+
+    def _pixels(self, start, stop, npoints, left=0., right=599.):
+        # one real unit per pixel
+        self.proxy.model = ScanModel(start, stop, npoints, AffineMap(0., 1.))
+        return self.proxy.pointPixels(left, right)
+
+    def test_few(self):
+        self.assertEqual(len(self._pixels(0., 10., 0)), 0)
+        np.testing.assert_array_equal(self._pixels(2.3, 10., 1), [2.])
+        self.assertEqual(len(self._pixels(-2.3, 10., 1)), 0)
+        np.testing.assert_array_equal(self._pixels(2.3, 10.6, 2), [2., 11.])
+        np.testing.assert_array_equal(self._pixels(10.6, 2.3, 2), [11., 2.])
+
+    def test_start_is_stop(self):
+        np.testing.assert_array_equal(self._pixels(7.6, 7.6, 5), [8.])
+        self.assertEqual(len(self._pixels(-7.6, -7.6, 5)), 0)
+
+    def test_partly_visible(self):
+        np.testing.assert_array_equal(
+            self._pixels(-10., 100., 12, 0., 50.), np.arange(0., 51., 10.))
+        np.testing.assert_array_equal(
+            self._pixels(100., -10., 12, 0., 50.), np.arange(50., -1., -10.))
+        self.assertEqual(len(self._pixels(-10., -1., 12, 0., 50.)), 0)
+
+    def test_many(self):
+        for start, stop, n in ((-10., 1e3, 1002), (3.3, 500.2, 41),
+                               (0., 1e-310, 10)):
+            with self.subTest(start=start, stop=stop, n=n):
+                x = np.linspace(start, stop, n)
+                x = np.round(x[(x >= 0.) & (x <= 599.)])
+                np.testing.assert_array_equal(self._pixels(start, stop, n),
+                                              np.unique(x))
+
+    def test_dense(self):
+        for start, stop, n in ((0., 599., 10**9), (-1e3, 1e3, 10**6),
+                               (300.2, 310.7, 100)):
+            with self.subTest(start=start, stop=stop, n=n):
+                p = self._pixels(start, stop, n)
+                self.assertLessEqual(len(p), 600)
+                np.testing.assert_array_equal(p, np.round(p))
+                self.assertTrue(np.all(np.diff(p) == 1))
+                self.assertGreaterEqual(p[0], 0.)
+                self.assertLessEqual(p[-1], 599.)
+        np.testing.assert_array_equal(self._pixels(0., 599., 10**9),
+                                      np.arange(600.))
+
+
+class SliderRangeTest(unittest.TestCase):
+    def assertPlaced(self, widget):
+        proxy, slider = widget.proxy, widget.proxy.slider
+        for pos, val in ((slider.minPos, proxy.realMin),
+                         (slider.maxPos, proxy.realMax)):
+            self.assertGreaterEqual(pos, slider.minimum())
+            self.assertLessEqual(pos, slider.maximum())
+            self.assertEqual(pos, proxy.realToRange(val))
+
+    def test_set_before_show(self):
+        widget = ScanWidget()
+        widget.setMin(-1.)
+        widget.setMax(1.)
+        widget.resize(600, 120)
+        widget.show()
+        app.processEvents()
+        slider = widget.proxy.slider
+        self.assertEqual(slider.maximum(), 563)
+        self.assertEqual((slider.minPos, slider.maxPos), (288., 290.))
+        self.assertPlaced(widget)
+        widget.deleteLater()
+
+    def test_resize(self):
+        widget = ScanWidget()
+        widget.resize(600, 120)
+        widget.show()
+        widget.setModel(ScanModel(-1., 3., 10))
+        for width in (900, 300, 601):
+            with self.subTest(width=width):
+                widget.resize(width, 120)
+                app.processEvents()
+                self.assertPlaced(widget)
+                self.assertEqual((widget.proxy.realMin,
+                                  widget.proxy.realMax), (-1., 3.))
+        widget.deleteLater()
+
+
+class SetModelTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = ScanWidget()
+
+    def tearDown(self):
+        self.widget.deleteLater()
+
+    def _show(self):
+        self.widget.resize(600, 120)
+        self.widget.show()
+        app.processEvents()
+
+    def assertFitted(self, model):
+        # the scan fills the middle third of the 563 pixels of the slider
+        self.assertIs(self.widget.model(), model)
+        self.assertEqual(model.view.scale, 563/9)
+        self.assertAlmostEqual(model.view.left, -4.)
+        slider = self.widget.proxy.slider
+        self.assertAlmostEqual(slider.minPos, 563/3, places=9)
+        self.assertAlmostEqual(slider.maxPos, 2*563/3, places=9)
+
+    def test_fit(self):
+        self._show()
+        model = ScanModel(-1., 2., 10)
+        self.widget.setModel(model)
+        self.assertFitted(model)
+
+    def test_fit_before_show(self):
+        model = ScanModel(-1., 2., 10)
+        self.widget.setModel(model)
+        self._show()
+        self.assertFitted(model)
+
+    def test_keep_view(self):
+        view = AffineMap(-10., 20.)
+        for shown in (False, True):
+            with self.subTest(shown=shown):
+                model = ScanModel(-1., 2., 10, view)
+                self.widget.setModel(model)
+                self._show()
+                self.assertEqual(model.view, view)
+                self.assertEqual(self.widget.proxy.slider.minPos, 180.)
+
+    def test_empty(self):
+        self._show()
+        view = self.widget.model().view
+        model = ScanModel(1., 1., 10)
+        self.widget.setModel(model)
+        self.assertEqual(model.view, view)
+
+    def test_switch(self):
+        self._show()
+        a, b = ScanModel(0., 1., 10), ScanModel(5., 7., 3)
+        self.widget.setModel(a)
+        self.widget.proxy.handleZoom(2., 100.)
+        self.widget.setMax(.5)
+        view = a.view
+        self.widget.setModel(b)
+        self.widget.setMax(8.)
+        self.widget.setModel(a)
+        self.assertEqual((a.start, a.stop, a.npoints), (0., .5, 10))
+        self.assertEqual((b.start, b.stop, b.npoints), (5., 8., 3))
+        self.assertIs(a.view, view)
+        self.assertEqual(self.widget.proxy.slider.maxPos,
+                         self.widget.proxy.realToRange(.5))
+
+
+class ScanDelegateTest(unittest.TestCase):
+    def setUp(self):
+        self.items = QtGui.QStandardItemModel()
+        for i in range(20):
+            item = QtGui.QStandardItem()
+            item.setData(ScanModel(i, i + 1., 10), ScanDelegate.modelRole)
+            self.items.appendRow(item)
+        self.view = QtWidgets.QListView()
+        self.view.setModel(self.items)
+        self.delegate = ScanDelegate(self.view)
+        self.view.setItemDelegate(self.delegate)
+        self.view.resize(700, 400)
+        self.view.show()
+        app.processEvents()
+
+    def tearDown(self):
+        self.view.deleteLater()
+        for editor in self.delegate.pool:
+            editor.deleteLater()
+
+    def _open(self, row):
+        index = self.items.index(row, 0)
+        self.view.openPersistentEditor(index)
+        app.processEvents()
+        return self.view.indexWidget(index)
+
+    def _close(self, row):
+        self.view.closePersistentEditor(self.items.index(row, 0))
+
+    def assertFitted(self, editor, row):
+        model = self.items.item(row).data(ScanDelegate.modelRole)
+        self.assertIs(editor.model(), model)
+        slider = editor.proxy.slider
+        span = slider.maximum()
+        self.assertGreater(span, 100)
+        self.assertEqual(model.view.scale,
+                         span/(3*(model.stop - model.start)))
+        self.assertAlmostEqual(slider.minPos, span/3, places=9)
+        self.assertAlmostEqual(slider.maxPos, 2*span/3, places=9)
+
+    def test_create(self):
+        editors = [self._open(row) for row in range(3)]
+        self.assertEqual(len(set(map(id, editors))), 3)
+        for row, editor in enumerate(editors):
+            self.assertFitted(editor, row)
+
+    def test_reuse(self):
+        editor = self._open(0)
+        self._close(0)
+        self.assertIn(editor, self.delegate.pool)
+        self.assertIsNone(editor.parent())
+        self.assertIs(self._open(5), editor)
+        self.assertFitted(editor, 5)
+        self.assertNotIn(editor, self.delegate.pool)
+
+    def test_pool_size(self):
+        n = ScanDelegate.poolSize + 3
+        for row in range(n):
+            self._open(row)
+        for row in range(n):
+            self._close(row)
+        self.assertEqual(len(self.delegate.pool), ScanDelegate.poolSize)
+
+    def test_commit(self):
+        editor = self._open(2)
+        committed = []
+        self.delegate.commitData.connect(committed.append)
+        editor.setMax(10.)
+        self.assertEqual(committed, [editor])
+        model = self.items.item(2).data(ScanDelegate.modelRole)
+        self.assertEqual((model.start, model.stop), (2., 10.))
+        editor.setMax(10.)  # no change
+        self.assertEqual(committed, [editor])
+
+
+class WheelZoomTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = ScanWidget()
+        self.widget.resize(600, 120)
+        self.widget.show()
+        self.axis = self.widget.proxy.axis
+        self.zooms = []
+        self.axis.sigZoom.connect(lambda *args: self.zooms.append(args))
+
+    def tearDown(self):
+        self.widget.deleteLater()
+
+    def _wheel(self, x, dy):
+        ev = QtGui.QWheelEvent(QtCore.QPointF(x, 10), QtCore.QPointF(x, 10),
+                               QtCore.QPoint(0, 0), QtCore.QPoint(0, dy),
+                               QtCore.Qt.NoButton, QtCore.Qt.NoModifier,
+                               QtCore.Qt.ScrollUpdate, False)
+        QtWidgets.QApplication.sendEvent(self.axis, ev)
+
+    def test_merged(self):
+        anchor = 200 - self.widget.proxy.slider.handleWidth()/2
+        merged = self.axis.mergedZoomEvents
+        for dy in (120, 120, -40, 15):
+            self._wheel(200, dy)
+        self.assertEqual(self.zooms, [])
+        self.assertTrue(self.axis.zoomTimer.isActive())
+        QtTest.QTest.qWait(100)
+        self.assertEqual(self.zooms, [(1.05**(215/120.), anchor)])
+        self.assertEqual(self.axis.mergedZoomEvents, merged + 3)
+        self.assertFalse(self.axis.zoomTimer.isActive())
+
+    def test_new_anchor(self):
+        offset = self.widget.proxy.slider.handleWidth()/2
+        merged = self.axis.mergedZoomEvents
+        self._wheel(200, 120)
+        self._wheel(200, 120)
+        self._wheel(300, -120)
+        # the pending zoom is applied before the one at the new anchor
+        self.assertEqual(self.zooms, [(1.05**2, 200 - offset)])
+        QtTest.QTest.qWait(100)
+        self.assertEqual(self.zooms, [(1.05**2, 200 - offset),
+                                      (1.05**-1, 300 - offset)])
+        self.assertEqual(self.axis.mergedZoomEvents, merged + 1)
+
+    def test_cancelled(self):
+        self._wheel(200, 120)
+        self._wheel(200, -120)
+        QtTest.QTest.qWait(100)
+        self.assertEqual(self.zooms, [])
+
+
+class ZoomPrefetchTest(unittest.TestCase):
+    def test_reverse(self):
+        # touchpads send fractions of a notch
+        for delta in (120, 40, 15):
+            with self.subTest(delta=delta):
+                widget = ScanWidget()
+                widget.resize(600, 120)
+                axis = widget.proxy.axis
+                axis.grab()
+                ticker = axis.ticker
+                ticker.clear()
+                for d in ([delta]*5 + [-delta]*5)*3:
+                    axis.zoomDelta, axis.zoomAnchor = d, 200.
+                    axis.flushZoom()
+                    axis.grab()
+                    Prefetcher.executor.submit(int).result()
+                self.assertEqual(ticker.misses, 1)
+                widget.deleteLater()
+
+
+class AxisLayerTest(unittest.TestCase):
+    def test_scroll(self):
+        # scrolled layers are pixel identical to full redraws
+        for width, start, stop in ((250, 0., 10.), (400, 1e9, 1e9 + 1e-3),
+                                   (600, -1234.5, 987.25),
+                                   (1000, .001, .0013)):
+            with self.subTest(width=width, start=start, stop=stop):
+                widget = ScanWidget()
+                widget.resize(width, 120)
+                widget.show()
+                proxy = widget.proxy
+                proxy.setModel(ScanModel(start, stop, 10))
+                axis = proxy.axis
+                axis.grab()
+                r = random.Random(width)
+                scrolled = 0
+                for i in range(40):
+                    if r.random() < .15:
+                        proxy.handleZoom(r.choice((1.05, 1/1.05, 1.3)),
+                                         r.uniform(0, width))
+                    else:
+                        proxy.handlePan(r.choice((1, 3, -1, -4, 17, -33)))
+                    key, layer = axis.layerKey, axis.layer
+                    image = axis.grab().toImage()
+                    scrolled += axis.layerKey == key and \
+                        axis.layer is layer
+                    axis.layerKey = None
+                    self.assertEqual(image, axis.grab().toImage())
+                self.assertGreater(scrolled, 20)
+                widget.deleteLater()
+
+
+class SliderRepaintTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = ScanWidget()
+        self.widget.resize(600, 120)
+        self.widget.show()
+        app.processEvents()
+        self.widget.fitToView()
+        self.slider = self.widget.proxy.slider
+
+    def tearDown(self):
+        self.widget.deleteLater()
+
+    def test_handle_rect(self):
+        # handleRect() is where the fake sliders' style draws the handles
+        s = self.slider
+        s.grab()
+        r = random.Random(1)
+        for i in range(100):
+            s.setSpan(*sorted((r.uniform(0, s.maximum()),
+                               r.uniform(0, s.maximum()))))
+            for dummy, handle in zip(s.handleStyles,
+                                     (s.minSlider, s.maxSlider)):
+                opt = QtWidgets.QStyleOptionSlider()
+                s.initStyleOption(opt)
+                s.initHandleStyleOption(opt, handle)
+                rect = dummy.style().subControlRect(
+                    QtWidgets.QStyle.CC_Slider, opt,
+                    QtWidgets.QStyle.SC_SliderHandle, dummy)
+                self.assertEqual(s.handleRect(handle), rect)
+
+    def test_partial(self):
+        # repainting only the updated rects gives the full repaint
+        s = self.slider
+        image = s.grab()
+        rects = []
+        update = s.update
+
+        def record(*args):
+            rects.append(QtCore.QRect(*args) if args else s.rect())
+            update(*args)
+        s.update = record
+        r = random.Random(0)
+        full = 0
+        for i in range(200):
+            del rects[:]
+            k = r.random()
+            if k < .4:
+                s.setLowerPosition(r.uniform(0, s.maxVal))
+            elif k < .8:
+                s.setUpperPosition(r.uniform(s.minVal, s.maximum()))
+            else:
+                s.setSpan(*sorted((r.uniform(0, s.maximum()),
+                                   r.uniform(0, s.maximum()))))
+            full += s.rect() in rects
+            region = QtGui.QRegion()
+            for rect in rects:
+                region = region.united(rect)
+            painter = QtGui.QPainter(image)
+            for rect in region.rects():
+                painter.drawPixmap(rect.topLeft(), s.grab(rect))
+            painter.end()
+            self.assertEqual(image.toImage(), s.grab().toImage())
+        self.assertLess(full, 5)
+
+
+class EmissionThrottleTest(unittest.TestCase):
+    # Timeouts are triggered by hand unless the test waits for the timer.
+    def _throttle(self, policy, interval=50):
+        self.emitted = []
+        t = EmissionThrottle(self.emitted.append, "test")
+        t.setPolicy(policy, interval)
+        return t
+
+    def test_immediate(self):
+        t = self._throttle(ScanWidget.emitImmediate)
+        t.push(1.)
+        t.press()
+        t.push(2.)
+        t.push(3.)
+        self.assertEqual(self.emitted, [1., 2., 3.])
+        t.release()
+        self.assertEqual(self.emitted, [1., 2., 3.])
+
+    def test_not_dragging(self):
+        for policy in (ScanWidget.emitRateLimited, ScanWidget.emitDebounced,
+                       ScanWidget.emitOnRelease):
+            with self.subTest(policy=policy):
+                t = self._throttle(policy)
+                t.push(1.)
+                t.push(2.)
+                self.assertEqual(self.emitted, [1., 2.])
+                self.assertFalse(t.timer.isActive())
+
+    def test_rate_limited(self):
+        t = self._throttle(ScanWidget.emitRateLimited)
+        t.press()
+        t.push(1.)
+        self.assertEqual(self.emitted, [1.])  # leading edge
+        self.assertTrue(t.timer.isActive())
+        t.push(2.)
+        t.push(3.)
+        self.assertEqual(self.emitted, [1.])
+        t.handleTimeout()
+        self.assertEqual(self.emitted, [1., 3.])
+        self.assertTrue(t.timer.isActive())
+        t.handleTimeout()  # nothing new
+        self.assertEqual(self.emitted, [1., 3.])
+        t.push(4.)
+        t.release()
+        self.assertEqual(self.emitted, [1., 3., 4.])
+        self.assertFalse(t.timer.isActive())
+
+    def test_debounced(self):
+        t = self._throttle(ScanWidget.emitDebounced)
+        t.press()
+        t.push(1.)
+        t.push(2.)
+        self.assertEqual(self.emitted, [])
+        self.assertTrue(t.timer.isActive())
+        t.handleTimeout()  # trailing edge
+        self.assertEqual(self.emitted, [2.])
+        self.assertFalse(t.timer.isActive())
+        t.push(3.)
+        t.release()
+        self.assertEqual(self.emitted, [2., 3.])
+
+    def test_debounced_timer(self):
+        t = self._throttle(ScanWidget.emitDebounced, 10)
+        t.press()
+        t.push(1.)
+        t.push(2.)
+        QtTest.QTest.qWait(100)
+        self.assertEqual(self.emitted, [2.])
+        t.release()
+        self.assertEqual(self.emitted, [2.])
+
+    def test_on_release(self):
+        t = self._throttle(ScanWidget.emitOnRelease, 10)
+        t.press()
+        for val in (1., 2., 3.):
+            t.push(val)
+        self.assertFalse(t.timer.isActive())
+        QtTest.QTest.qWait(100)
+        self.assertEqual(self.emitted, [])
+        t.release()
+        self.assertEqual(self.emitted, [3.])
+        t.release()
+        self.assertEqual(self.emitted, [3.])
+
+    def test_policy_change_flushes(self):
+        t = self._throttle(ScanWidget.emitOnRelease)
+        t.press()
+        t.push(1.)
+        t.setPolicy(ScanWidget.emitImmediate, 50)
+        self.assertEqual(self.emitted, [1.])
+
+
+if __name__ == "__main__":
+    unittest.main()
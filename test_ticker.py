@@ -1,7 +1,11 @@
+import os
+import subprocess
+import sys
 import unittest
+import warnings
 import numpy as np
 
-from ticker import Ticker
+from ticker import Ticker, ScalarTicker, CachedTicker, Prefetcher
 
 
 class TickTest(unittest.TestCase):
@@ -46,6 +50,145 @@ class TickTest(unittest.TestCase):
                     if np.all(np.isfinite((a, b))):
                         self._one(a, b, n)
 
+    def test_batch(self):
+        intervals = [(a, b) for a in self._a() for b in self._b(a)
+                     if a < b and np.all(np.isfinite((a, b)))]
+        a, b = np.array(intervals).T
+        for n in (2, 3, 4, 10):
+            t = Ticker(n)
+            batch = t.batch(a, b)
+            self.assertEqual(len(batch), len(intervals))
+            for i, (ai, bi) in enumerate(intervals):
+                with self.subTest(a=ai, b=bi, n=n):
+                    ticks, prefix, labels = t(ai, bi)
+                    bticks, bprefix, blabels = batch[i]
+                    np.testing.assert_array_equal(ticks, bticks)
+                    self.assertEqual(prefix, bprefix)
+                    self.assertEqual(labels, blabels)
+
+    def test_batch_invalid(self):
+        t = Ticker()
+        for a, b, j in (([0., 2.], [1., 1.], 1), ([0., 0.], [0., 1.], 0),
+                        ([0., np.nan], [1., 1.], 1),
+                        ([0., 1., 0.], [1., 2., np.inf], 2)):
+            with self.subTest(a=a, b=b):
+                with warnings.catch_warnings():
+                    warnings.simplefilter("error")
+                    with self.assertRaisesRegex(ValueError,
+                                                "index {}$".format(j)):
+                        t.batch(a, b)
+
+    def test_scalar(self):
+        intervals = [(a, b) for a in self._a() for b in self._b(a)
+                     if a < b and np.all(np.isfinite((a, b)))]
+        for n in (2, 3, 4, 10):
+            t = Ticker(n)
+            s = ScalarTicker(n)
+            for a, b in intervals:
+                with self.subTest(a=a, b=b, n=n):
+                    u = t.layout(a, b)
+                    v = s.layout(a, b)
+                    self.assertEqual(u.ticks.tolist(), list(v.ticks))
+                    self.assertEqual(u.prefix, v.prefix)
+                    self.assertEqual(u.labels, v.labels)
+                    self.assertEqual((u.step, u.offset, u.magnitude,
+                                      u.decimals),
+                                     (v.step, v.offset, v.magnitude,
+                                      v.decimals))
+        # math.log10() rounds this magnitude below a power of ten
+        a, b = 1.2204819798888873e-05, 1.3061944647187617e-05
+        self.assertEqual(ScalarTicker(3, 2)(a, b)[1:], Ticker(3, 2)(a, b)[1:])
+
+    def test_scalar_powers(self):
+        # powers of ten are taken as exact, without falling back to NumPy
+        s = ScalarTicker()
+        k = range(-300, 309)
+        x = [10.**i for i in k]
+        self.assertEqual([s._floor_log10(i) for i in x], list(k))
+        self.assertEqual(np.floor(np.log10(x)).tolist(), list(k))
+        for a, b in ((0., .35), (-.01, .02), (.1, .2), (0., 1e-3),
+                     (1e-9, 5e-9), (-3.5e-200, 0.)):
+            s(a, b)
+        self.assertEqual(s.exponents, {})
+
+    def test_scalar_without_numpy(self):
+        code = ("import sys\n"
+                "from ticker import ScalarTicker\n"
+                "for a, b in (0, .35), (0, 10), (-1e-3, 1e-3):\n"
+                "    ScalarTicker()(a, b)\n"
+                "print('numpy' in sys.modules)\n")
+        out = subprocess.run([sys.executable, "-c", code], check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)),
+                             stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(out.stdout, "False\n")
+
+    def test_cached(self):
+        t = CachedTicker(Ticker(), maxsize=2)
+        ticks, prefix, labels = t(0, 1)
+        self.assertEqual((t.hits, t.misses, t.evictions), (0, 1, 0))
+        self.assertIs(t(0., 1.)[0], ticks)
+        self.assertEqual((t.hits, t.misses, t.evictions), (1, 1, 0))
+        t(1, 2)
+        t(2, 3)
+        self.assertEqual((t.hits, t.misses, t.evictions), (1, 3, 1))
+        t(1, 2)
+        self.assertEqual((t.hits, t.misses, t.evictions), (2, 3, 1))
+        t.ticker.min_ticks = 4
+        t(1, 2)
+        self.assertEqual((t.hits, t.misses, t.evictions), (2, 4, 2))
+        u = Ticker(4)(1, 2)
+        np.testing.assert_array_equal(t(1, 2)[0], u[0])
+        self.assertEqual(t(1, 2)[1:], u[1:])
+        self.assertFalse(ticks.flags.writeable)
+
+    def test_prefetch(self):
+        t = CachedTicker(Ticker())
+        t(0, 1)
+        intervals = [(0, 1), (0, 2), (-1, 1), (0, 1e-3)]
+        Prefetcher(t).submit(intervals).result()
+        self.assertEqual((t.hits, t.misses, t.prefetches), (0, 1, 3))
+        u = Ticker()
+        for a, b in intervals:
+            ticks, prefix, labels = t(a, b)
+            v = u(a, b)
+            np.testing.assert_array_equal(ticks, v[0])
+            self.assertEqual((prefix, labels), v[1:])
+        self.assertEqual((t.hits, t.misses, t.prefetches), (4, 1, 3))
+
+    def test_labels(self):
+        t = Ticker()
+        r = np.random.RandomState(0)
+        values = np.concatenate([
+            [0., -0., 1e-9, -1e-9, .5, -.5, .0005, -.0005, 1e17, -1e17],
+            r.standard_normal(100)*10.**r.randint(-6, 6, 100)])
+        for decimals in range(t.precision + 1):
+            for v in values, values[:1], values[::-1]:
+                format = "{{:1.{:d}f}}".format(decimals)
+                self.assertEqual(t.labels(v, decimals),
+                                 [t.fix_minus(format.format(x)) for x in v])
+        self.assertEqual(t.labels(values[:0], 2), [])
+
+    def test_pan(self):
+        for cls in Ticker, ScalarTicker:
+            r = np.random.RandomState(0)
+            for n in (2, 3, 10):
+                self._pan(cls(n), r)
+
+    def _pan(self, t, r):
+        for a in self._a():
+            for w in (1e-6, 1.3, 7e5):
+                w = max(w, abs(a)*1e-12)
+                layout = t.layout(a, a + w)
+                for d in r.uniform(-.3, .3, 3)*w:
+                    a += d
+                    with self.subTest(a=a, w=w, t=t, n=t.min_ticks):
+                        u = t.pan(layout, a, a + w)
+                        v = t.layout(a, a + w)
+                        np.testing.assert_array_equal(u.ticks, v.ticks)
+                        self.assertEqual(u.prefix, v.prefix)
+                        self.assertEqual(u.labels, v.labels)
+                    layout = u
+
     def _one(self, a, b, n=2, d=3):
         eps = 1e-8
         with self.subTest(a=a, b=b, n=n, d=d):
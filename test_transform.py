@@ -0,0 +1,62 @@
+import random
+import unittest
+from fractions import Fraction
+import numpy as np
+
+from transform import AffineMap
+
+
+class AffineMapTest(unittest.TestCase):
+    def test_scalar(self):
+        m = AffineMap(-3., 2.)
+        self.assertEqual(m.map(-3.), 0.)
+        self.assertEqual(m.map(1.), 8.)
+        self.assertEqual(m.inverse(8.), 1.)
+        self.assertEqual(m.inverse(0.), -3.)
+
+    def test_array(self):
+        m = AffineMap(1e9, 600/1e-3)
+        x = 1e9 + np.linspace(0, 1e-3, 101)
+        p = m.map(x)
+        self.assertEqual(p.shape, x.shape)
+        for xi, pi in zip(x, p):
+            self.assertEqual(m.map(xi), pi)
+        np.testing.assert_allclose(m.inverse(p), x, rtol=1e-15)
+
+    def test_zoom(self):
+        m = AffineMap(-3., 2.).zoom(4., 8.)
+        self.assertEqual(m.map(1.), 8.)
+        self.assertEqual(m.scale, 8.)
+
+    def test_pan(self):
+        m = AffineMap(-3., 2.).pan(4.)
+        self.assertEqual(m.map(1.), 12.)
+        self.assertEqual(m.scale, 2.)
+        m = AffineMap(1e9, 600/1e-3)
+        for dx in (1, -7, 599):
+            self.assertAlmostEqual(m.pan(dx).origin(m), dx, places=9)
+            self.assertAlmostEqual(m.pan(dx).pan(-dx).origin(m), 0.,
+                                   places=9)
+
+    def test_zoom_drift(self):
+        # narrow scan on a large offset, zoomed around random anchors
+        r = random.Random(0)
+        m = AffineMap(1e9, 600/1e-3)
+        left, scale = Fraction(1e9), Fraction(600/1e-3)
+        for i in range(200):
+            z = 1.05**r.choice((-1, 1))
+            p = r.uniform(0, 600)
+            m = m.zoom(z, p)
+            anchor = Fraction(p)/scale + left
+            scale *= Fraction(z)
+            left = anchor - Fraction(p)/scale
+        error = (Fraction(m.left) + Fraction(m.left_lo) - left)*scale
+        self.assertLess(abs(error), 1e-3)
+
+    def test_singular(self):
+        with self.assertRaises(ValueError):
+            AffineMap(0., 0.)
+
+
+if __name__ == "__main__":
+    unittest.main()
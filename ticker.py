@@ -1,6 +1,81 @@
 # Robert Jordens <rj@m-labs.hk>, 2016
 
-import numpy as np
+import math
+import threading
+from collections import OrderedDict
+
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+def _exp10(e):
+    """
+    Return `10**e` elementwise for an array of integral exponents.
+
+    `np.power()` on arrays may use SIMD code that rounds differently from
+    the scalar `pow()` the single interval methods use. There are only a
+    few distinct exponents, so evaluate those as scalars.
+    """
+    e, inverse = np.unique(e, return_inverse=True)
+    return np.array([10**x for x in e])[inverse].reshape(inverse.shape)
+
+
+class TickBatch:
+    """
+    Ragged tick layouts for many intervals, as returned by `Ticker.batch()`.
+
+    ticks: flat array of the tick values of all intervals
+    bounds: index array of length `n + 1`; the ticks of interval `i` are
+        `ticks[bounds[i]:bounds[i + 1]]`
+    labels: flat list of tick labels, indexed like `ticks`
+    prefixes: list of the `n` prefix strings
+    step, offset, magnitude, decimals: per-interval arrays of the
+        intermediate values `Ticker.__call__()` computes
+    """
+    def __init__(self, ticks, bounds, labels, prefixes,
+                 step, offset, magnitude, decimals):
+        self.ticks = ticks
+        self.bounds = bounds
+        self.labels = labels
+        self.prefixes = prefixes
+        self.step = step
+        self.offset = offset
+        self.magnitude = magnitude
+        self.decimals = decimals
+
+    def __len__(self):
+        return len(self.prefixes)
+
+    def __getitem__(self, i):
+        """
+        Return ticks, prefix and labels of interval `i` just like
+        `Ticker.__call__()` does.
+        """
+        start, stop = self.bounds[i], self.bounds[i + 1]
+        return (self.ticks[start:stop], self.prefixes[i],
+                self.labels[start:stop])
+
+
+class TickLayout:
+    """
+    Tick layout of one interval, as returned by `Ticker.layout()`.
+
+    ticks, prefix, labels: what `Ticker.__call__()` returns
+    values: the tick values with offset and magnitude removed, as labeled
+    step, offset, magnitude, decimals: the intermediate values they were
+        derived from
+    """
+    def __init__(self, ticks, prefix, labels, values,
+                 step, offset, magnitude, decimals):
+        self.ticks = ticks
+        self.prefix = prefix
+        self.labels = labels
+        self.values = values
+        self.step = step
+        self.offset = offset
+        self.magnitude = magnitude
+        self.decimals = decimals
 
 
 class Ticker:
@@ -24,6 +99,7 @@ class Ticker:
         self.min_ticks = min_ticks
         self.precision = precision
         self.steps = steps
+        self.label_templates = {}
 
     def step(self, i):
         """
@@ -39,11 +115,14 @@ class Ticker:
             if good_step <= step:
                 return good_step
 
-    def ticks(self, a, b):
+    def ticks(self, a, b, step=None):
         """
         Return recommended tick values for interval `[a, b[`.
+
+        `step` defaults to `step(b - a)`.
         """
-        step = self.step(b - a)
+        if step is None:
+            step = self.step(b - a)
         a0 = np.ceil(a/step)*step
         ticks = np.arange(a0, b, step)
         return ticks
@@ -81,13 +160,40 @@ class Ticker:
     def fix_minus(self, s):
         return s.replace("-", "−")  # unicode minus
 
+    def decimals(self, step):
+        """
+        Determine number of decimals to represent step sufficiently
+        accurate.
+        """
+        dynamic = -int(np.floor(np.log10(step)))
+        return min(max(0, dynamic), self.precision)
+
     def format(self, step):
         """
         Determine format string to represent step sufficiently accurate.
         """
-        dynamic = -int(np.floor(np.log10(step)))
-        dynamic = min(max(0, dynamic), self.precision)
-        return "{{:1.{:d}f}}".format(dynamic)
+        return "{{:1.{:d}f}}".format(self.decimals(step))
+
+    def labels(self, values, decimals):
+        """
+        Format `values` with `decimals` fixed decimals and unicode minus.
+
+        The result is identical to `fix_minus()` of each value formatted
+        with the string from `format()`. But a template for all values is
+        compiled once per number of decimals and values, and all values are
+        formatted and fixed in one go.
+        """
+        if not isinstance(values, (list, tuple)):
+            values = values.tolist()
+        if not values:
+            return []
+        key = decimals, len(values)
+        template = self.label_templates.get(key)
+        if template is None:
+            template = "\n".join(
+                ["{{:1.{:d}f}}".format(decimals)]*len(values))
+            self.label_templates[key] = template
+        return self.fix_minus(template.format(*values)).split("\n")
 
     def compact_exponential(self, v):
         """
@@ -125,12 +231,459 @@ class Ticker:
         Return tick values, prefix string to be show to the left or
         above the labels, and tick labels.
         """
-        ticks = self.ticks(a, b)
+        layout = self.layout(a, b)
+        return layout.ticks, layout.prefix, layout.labels
+
+    def layout(self, a, b):
+        """
+        Determine the `TickLayout` of the interval `[a, b[`.
+        """
+        step = self.step(b - a)
+        ticks = self.ticks(a, b, step)
         offset = self.offset(a, ticks[1] - ticks[0])
         t = ticks - offset
         magnitude = self.magnitude(t[0], t[-1], t[1] - t[0])
         t /= magnitude
         prefix = self.prefix(offset, magnitude)
-        format = self.format(t[1] - t[0])
-        labels = [self.fix_minus(format.format(t)) for t in t]
-        return ticks, prefix, labels
+        decimals = self.decimals(t[1] - t[0])
+        labels = self.labels(t, decimals)
+        return TickLayout(ticks, prefix, labels, t,
+                          step, offset, magnitude, decimals)
+
+    def pan(self, layout, a, b):
+        """
+        Determine the `TickLayout` of the interval `[a, b[` by updating
+        the `layout` of a neighbouring interval.
+
+        If step, offset, magnitude and decimals stay the same, as they do
+        when the view is only translated, the ticks that remain in the
+        interval keep their label strings and only the ticks that enter
+        at the edges are formatted. Otherwise this falls back to
+        `layout()`. Either way the result is identical to `layout()`.
+        """
+        step = self.step(b - a)
+        if step != layout.step:
+            return self.layout(a, b)
+        ticks = self.ticks(a, b, step)
+        offset = self.offset(a, ticks[1] - ticks[0])
+        if offset != layout.offset:
+            return self.layout(a, b)
+        t = ticks - offset
+        magnitude = self.magnitude(t[0], t[-1], t[1] - t[0])
+        if magnitude != layout.magnitude:
+            return self.layout(a, b)
+        t /= magnitude
+        decimals = self.decimals(t[1] - t[0])
+        if decimals != layout.decimals:
+            return self.layout(a, b)
+
+        # Ticks are multiples of step; match them up with the old ones by
+        # their index. Labels are reused where the value is the same bit for
+        # bit (that includes the sign of zero).
+        index = np.arange(len(t)) + (round(ticks[0]/step) -
+                                     round(layout.ticks[0]/step))
+        inside = (index >= 0) & (index < len(layout.values))
+        same = np.zeros(len(t), dtype=bool)
+        u = layout.values[index[inside]]
+        v = t[inside]
+        same[inside] = (u == v) & (np.signbit(u) == np.signbit(v))
+        fresh = iter(self.labels(t[~same], decimals))
+        labels = [layout.labels[i] if s else next(fresh)
+                  for i, s in zip(index.tolist(), same.tolist())]
+        return TickLayout(ticks, layout.prefix, labels, t,
+                          step, offset, magnitude, decimals)
+
+    def batch(self, a, b):
+        """
+        Determine ticks, prefixes and labels for many intervals
+        `[a[i], b[i][` at once.
+
+        Step, offset, magnitude and label precision are computed as array
+        operations over all intervals. The result agrees exactly with
+        calling the ticker on each interval separately.
+
+        Return a `TickBatch`. Raise `ValueError` if any interval is empty,
+        reversed or not finite.
+        """
+        a = np.asarray(a, dtype=np.float64).ravel()
+        b = np.asarray(b, dtype=np.float64).ravel()
+        if a.shape != b.shape:
+            raise ValueError("Need as many interval starts as ends")
+        invalid = ~(np.isfinite(a) & np.isfinite(b) & (a < b))
+        if invalid.any():
+            j = int(np.argmax(invalid))
+            raise ValueError(
+                "Need finite intervals with a < b, got [{!r}, {!r}[ at "
+                "index {}".format(float(a[j]), float(b[j]), j))
+        i = b - a
+
+        # step()
+        with np.errstate(invalid="ignore"):
+            rational = i/self.min_ticks
+            step_magnitude = _exp10(np.floor(np.log10(rational)))
+        step = np.full_like(rational, np.nan)
+        for m in self.steps:
+            good_step = m*step_magnitude
+            step = np.where(np.isnan(step) & (good_step <= rational),
+                            good_step, step)
+
+        # ticks(): replicate the way np.arange() fills its output
+        a0 = np.ceil(a/step)*step
+        length = np.maximum(np.ceil((b - a0)/step), 0).astype(np.intp)
+        bounds = np.zeros(len(a) + 1, dtype=np.intp)
+        np.cumsum(length, out=bounds[1:])
+        first = bounds[:-1]
+        second = a0 + step
+        delta = second - a0
+        index = np.arange(bounds[-1]) - np.repeat(first, length)
+        ticks = np.repeat(a0, length) + index*np.repeat(delta, length)
+        ticks[first[length > 0]] = a0[length > 0]
+        ticks[first[length > 1] + 1] = second[length > 1]
+
+        # offset()
+        dt = ticks[first + 1] - ticks[first]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            la = np.floor(np.log10(abs(a)))
+            lr = np.floor(np.log10(dt))
+            offset_magnitude = _exp10(lr - 1 + self.precision)
+            offset = np.floor(a/offset_magnitude)*offset_magnitude
+        offset = np.where((a == 0.) | (la - lr < self.precision),
+                          0., offset)
+
+        # magnitude()
+        t = ticks - np.repeat(offset, length)
+        t0 = t[first]
+        t1 = t[first + 1]
+        tn = t[bounds[1:] - 1]
+        with np.errstate(divide="ignore"):
+            v = np.floor(np.log10(np.maximum(abs(t0), abs(tn))))
+            w = np.floor(np.log10(t1 - t0))
+        magnitude = np.where((v < self.precision) & (w > -self.precision),
+                             1., _exp10(v))
+        t /= np.repeat(magnitude, length)
+
+        # format()
+        dynamic = -np.floor(np.log10(t[first + 1] - t[first]))
+        decimals = np.clip(dynamic, 0, self.precision).astype(int)
+
+        prefixes = []
+        labels = []
+        prefix_cache = {}
+        values = t.tolist()
+        for j in range(len(a)):
+            key = offset[j], magnitude[j]
+            prefix = prefix_cache.get(key)
+            if prefix is None:
+                prefix = prefix_cache[key] = self.prefix(*key)
+            prefixes.append(prefix)
+            labels.extend(self.labels(values[bounds[j]:bounds[j + 1]],
+                                      decimals[j]))
+        return TickBatch(ticks, bounds, labels, prefixes,
+                         step, offset, magnitude, decimals)
+
+
+class ScalarTicker(Ticker):
+    """
+    `Ticker` for one interval at a time, computed with `math` and tuples
+    instead of NumPy.
+
+    Each NumPy call on a scalar costs much more than the `math` function,
+    and there are only a handful of ticks per interval. The operations are
+    the same as those of `Ticker`, so the layouts are identical, except
+    that `ticks` and `values` of the `TickLayout` are tuples. `batch()` is
+    inherited and still uses NumPy.
+
+    `math.log10()` and `np.log10()` may differ in the last bits, which
+    changes the decimal exponent of values just below a power of ten.
+    Where the logarithm is that close to an integer, the exponent is taken
+    from NumPy, and remembered, unless the value is an exact power of ten.
+    """
+    def __init__(self, *args, **kwargs):
+        Ticker.__init__(self, *args, **kwargs)
+        self.exponents = {}
+
+    def _floor_log10(self, x):
+        e = math.log10(x)
+        k = math.floor(e)
+        if e - k < 1e-12 or k + 1 - e < 1e-12:
+            k = round(e)
+            if -300 <= k <= 308 and x == 10.**k:
+                # the nearest double to a power of ten, like 0.1, has
+                # that power as its logarithm also in NumPy, short of
+                # subnormals
+                return k
+            k = self.exponents.get(x)
+            if k is None:
+                if len(self.exponents) > 1024:
+                    self.exponents.clear()
+                k = self.exponents[x] = int(np.floor(np.log10(x)))
+        return k
+
+    def _exp10(self, e):
+        # like NumPy, overflow to inf
+        try:
+            return 10.**e
+        except OverflowError:
+            return math.inf
+
+    def step(self, i):
+        if not i:
+            raise ValueError("Need a finite interval")
+        step = i/self.min_ticks
+        step_magnitude = self._exp10(self._floor_log10(step))
+        for m in self.steps:
+            good_step = m*step_magnitude
+            if good_step <= step:
+                return good_step
+
+    def ticks(self, a, b, step=None):
+        if step is None:
+            step = self.step(b - a)
+        # keep the sign of zero like np.ceil()
+        a0 = math.copysign(math.ceil(a/step), a)*step
+        # fill like np.arange()
+        n = math.ceil((b - a0)/step)
+        if n <= 0:
+            return ()
+        delta = (a0 + step) - a0
+        ticks = [a0 + i*delta for i in range(n)]
+        ticks[0] = a0
+        return tuple(ticks)
+
+    def offset(self, a, step):
+        if a == 0.:
+            return 0.
+        la = self._floor_log10(abs(a))
+        lr = self._floor_log10(step)
+        if la - lr < self.precision:
+            return 0.
+        magnitude = self._exp10(lr - 1 + self.precision)
+        offset = float(math.floor(a/magnitude))*magnitude
+        return offset
+
+    def magnitude(self, a, b, step):
+        v = self._floor_log10(max(abs(a), abs(b)))
+        w = self._floor_log10(step)
+        if v < self.precision and w > -self.precision:
+            return 1.
+        return self._exp10(v)
+
+    def decimals(self, step):
+        dynamic = -self._floor_log10(step)
+        return min(max(0, dynamic), self.precision)
+
+    # Subtracting zero and dividing by one are exact, also for signed
+    # zeros, so the usual cases skip the loop.
+    def _shift(self, ticks, offset):
+        if offset == 0.:
+            return ticks
+        return tuple([x - offset for x in ticks])
+
+    def _scale(self, t, magnitude):
+        if magnitude == 1.:
+            return t
+        return tuple([x/magnitude for x in t])
+
+    def layout(self, a, b):
+        step = self.step(b - a)
+        ticks = self.ticks(a, b, step)
+        offset = self.offset(a, ticks[1] - ticks[0])
+        t = self._shift(ticks, offset)
+        magnitude = self.magnitude(t[0], t[-1], t[1] - t[0])
+        t = self._scale(t, magnitude)
+        prefix = self.prefix(offset, magnitude)
+        decimals = self.decimals(t[1] - t[0])
+        labels = self.labels(t, decimals)
+        return TickLayout(ticks, prefix, labels, t,
+                          step, offset, magnitude, decimals)
+
+    def pan(self, layout, a, b):
+        step = self.step(b - a)
+        if step != layout.step:
+            return self.layout(a, b)
+        ticks = self.ticks(a, b, step)
+        offset = self.offset(a, ticks[1] - ticks[0])
+        if offset != layout.offset:
+            return self.layout(a, b)
+        t = self._shift(ticks, offset)
+        magnitude = self.magnitude(t[0], t[-1], t[1] - t[0])
+        if magnitude != layout.magnitude:
+            return self.layout(a, b)
+        t = self._scale(t, magnitude)
+        decimals = self.decimals(t[1] - t[0])
+        if decimals != layout.decimals:
+            return self.layout(a, b)
+
+        # as in Ticker.pan()
+        shift = round(ticks[0]/step) - round(layout.ticks[0]/step)
+        old = layout.values
+        labels = []
+        fresh = []
+        for i, v in enumerate(t):
+            j = i + shift
+            if 0 <= j < len(old) and old[j] == v and \
+                    math.copysign(1., old[j]) == math.copysign(1., v):
+                labels.append(layout.labels[j])
+            else:
+                labels.append(None)
+                fresh.append(i)
+        for i, label in zip(fresh, self.labels([t[i] for i in fresh],
+                                               decimals)):
+            labels[i] = label
+        return TickLayout(ticks, layout.prefix, labels, t,
+                          step, offset, magnitude, decimals)
+
+
+class CachedTicker:
+    """
+    Memoize the layouts of a `Ticker` in a bounded least-recently-used cache.
+
+    The cache is keyed on the interval and the ticker parameters, so
+    redrawing an unchanged view skips the tick computation and the label
+    formatting. On a miss the most recently used layout is updated with
+    `Ticker.pan()`, which reuses the labels of ticks that stay in view.
+    Cached tick arrays are read-only and all callers share the returned
+    label lists; do not modify them.
+
+    The cache may be filled from other threads with `prefetch()`. The lock
+    only guards the cache bookkeeping; layouts are computed outside of it,
+    so a lookup never waits for another thread's computation.
+
+    Other attributes are looked up on the wrapped ticker.
+    """
+    def __init__(self, ticker=None, maxsize=64):
+        """
+        ticker: the `Ticker` to memoize, a default `Ticker()` if `None`
+        maxsize: maximum number of cached layouts
+        """
+        if ticker is None:
+            ticker = Ticker()
+        self.ticker = ticker
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.last = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetches = 0
+
+    def __getattr__(self, name):
+        return getattr(self.ticker, name)
+
+    def key(self, a, b):
+        t = self.ticker
+        return float(a), float(b), t.min_ticks, t.precision, tuple(t.steps)
+
+    def __call__(self, a, b):
+        """
+        Return ticks, prefix and labels for `[a, b[` like `Ticker()`.
+        """
+        layout = self.layout(a, b)
+        return layout.ticks, layout.prefix, layout.labels
+
+    def layout(self, a, b):
+        """
+        Return the `TickLayout` of `[a, b[`.
+        """
+        key = self.key(a, b)
+        with self.lock:
+            layout = self.cache.get(key)
+            if layout is not None:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                self.last = layout
+                return layout
+            self.misses += 1
+            last = self.last
+        layout = self._compute(last, a, b)
+        with self.lock:
+            self.last = layout
+            self._store(key, layout)
+        return layout
+
+    def prefetch(self, a, b):
+        """
+        Compute and cache the layout of `[a, b[` unless it is cached
+        already. Unlike `layout()` this does not count as a use of the
+        layout. Safe to call from any thread.
+        """
+        key = self.key(a, b)
+        with self.lock:
+            if key in self.cache:
+                return
+            last = self.last
+        layout = self._compute(last, a, b)
+        with self.lock:
+            if key not in self.cache:
+                self.prefetches += 1
+                self._store(key, layout)
+
+    def _compute(self, last, a, b):
+        if last is None:
+            layout = self.ticker.layout(a, b)
+        else:
+            layout = self.ticker.pan(last, a, b)
+        if not isinstance(layout.ticks, tuple):
+            layout.ticks.flags.writeable = False
+        return layout
+
+    def _store(self, key, layout):
+        self.cache[key] = layout
+        while len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Empty the cache and reset the counters.
+        """
+        with self.lock:
+            self.cache.clear()
+            self.last = None
+            self.hits = self.misses = self.evictions = self.prefetches = 0
+
+
+class Prefetcher:
+    """
+    Fill a `CachedTicker` with the layouts of predicted intervals in a
+    background thread.
+
+    Each `submit()` supersedes the previous one: intervals of an earlier
+    prediction that have not been started yet are skipped. All
+    prefetchers share a single worker thread.
+    """
+    executor = None
+
+    def __init__(self, ticker):
+        """
+        ticker: the `CachedTicker` to fill
+        """
+        self.ticker = ticker
+        self.generation = 0
+
+    def submit(self, intervals):
+        """
+        Prefetch the layouts of the `(a, b)` pairs in `intervals`, in
+        order. Returns a `concurrent.futures.Future` of the run.
+        """
+        if Prefetcher.executor is None:
+            # Only import and start the worker once there is work.
+            from concurrent.futures import ThreadPoolExecutor
+            Prefetcher.executor = ThreadPoolExecutor(1, "Prefetcher")
+        self.generation += 1
+        return Prefetcher.executor.submit(self._run, self.generation,
+                                          list(intervals))
+
+    def _run(self, generation, intervals):
+        for a, b in intervals:
+            if generation != self.generation:
+                return
+            self.ticker.prefetch(a, b)
+
+    def cancel(self):
+        """
+        Skip the intervals of the last prediction that have not been
+        started yet.
+        """
+        self.generation += 1